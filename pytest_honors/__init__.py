@@ -1,30 +1,73 @@
 """The machinery behind the constraints honoring reporting and enforcement."""
 
-import enum
+import json
+import time
+from functools import partial
 from operator import attrgetter
-from typing import Callable, Dict, List, Type
+from typing import Dict, Optional, Set
 
-from pytest import ExitCode, PytestWarning
+from pytest import ExitCode, PytestWarning, StashKey, UsageError, fixture, hookimpl
 
-from .constraints import ConstraintsGroup
+from . import evidence, fixtures
+from .constraints import CROSSWALKS, ConstraintsGroup
+from .emit import ReportEmitter
+# Public API: the documented way to mark fixtures is ``from pytest_honors import honors``.
+from .fixtures import honors  # noqa: F401
+from .index import HonorsIndex, constraint_key
+from .journal import SETUP_ERROR, EvidenceJournal
+from .patterns import PatternMatcher
 
 MAGIC_MARK = "honors"
+MARKER_HELP = (
+    "honors(constraint1, constraint2, ...): mark tests as honoring one or more constraints."
+)
 OPT_MARKDOWN_REPORT = "honors_report_markdown"
+OPT_JSON_REPORT = "honors_report_json"
+OPT_LAYOUT = "honors_report_layout"
 OPT_REGRESSION_FAIL = "honors_regression_fail"
 OPT_STORE_COUNTS = "honors_store_counts"
+OPT_ORDER = "honors_order"
+OPT_MAXFAIL_CONSTRAINT = "honors_maxfail_constraint"
+OPT_JOURNAL = "honors_journal"
+OPT_EVIDENCE_CACHE = "honors_evidence_cache"
+OPT_EVIDENCE_KEY = "honors_evidence_key"
+OPT_EVIDENCE_MAX_AGE = "honors_evidence_max_age"
+OPT_PATTERNS = "honors_patterns"
+PATTERNS_HELP = (
+    "lines like 'tests/auth/** = Group.member, Group.member' assigning constraints to every test "
+    "whose nodeid matches a glob, or a regex if it starts with 're:'"
+)
 CACHE_KEY_COUNTS = "honors/counts"
+CACHE_KEY_HONORERS = "honors/honorers"
+CACHE_KEY_EVIDENCE = "honors/evidence"
 
-_ITEMS: Dict[
-    # This is a subclass of ConstraintsGroup. Putting this at the top level lets us group related
-    # constraints together for reporting.
-    Type[ConstraintsGroup],
-    Dict[
-        # This is one of the members of the class,
-        enum.Enum,
-        # ...and this is a list of test functions marked with that member.
-        List[Callable],
-    ],
-] = {}
+# Identifies the JSON report format. Bump the version whenever existing keys change meaning.
+JSON_REPORT_SCHEMA = "pytest-honors-report"
+JSON_REPORT_VERSION = 1
+
+# By default, reuse evidence for up to a week.
+DEFAULT_EVIDENCE_MAX_AGE = 7 * 24 * 60 * 60
+
+# Ways to reorder tests: leave them alone, run honoring tests first, or run honoring tests first
+# with the ones honoring the most constraints at the front.
+ORDER_NONE = "none"
+ORDER_FIRST = "first"
+ORDER_WEIGHTED = "weighted"
+ORDERS = (ORDER_NONE, ORDER_FIRST, ORDER_WEIGHTED)
+
+# Markdown report layouts: every test listed under each constraint it honors, or each test listed
+# once in a catalog that the constraints refer to.
+LAYOUT_FULL = "full"
+LAYOUT_NORMALIZED = "normalized"
+LAYOUTS = (LAYOUT_FULL, LAYOUT_NORMALIZED)
+
+# Other plugins can find the current session's HonorsIndex at config.stash[HONORS_INDEX_KEY].
+HONORS_INDEX_KEY = StashKey[HonorsIndex]()
+
+# This maps each subclass of ConstraintsGroup to its members, and each member to the list of test
+# items marked with it. Putting the group at the top level lets us group related constraints
+# together for reporting.
+_ITEMS = HonorsIndex()
 
 _RESULTS: Dict[
     # The key of this dict is the pytest-style path to a test, like
@@ -34,6 +77,46 @@ _RESULTS: Dict[
     str,
 ] = {}
 
+_SURVIVORS: Dict[
+    # Each constraint honored by at least one selected test...
+    ConstraintsGroup,
+    # ...maps to the nodeids of its selected honorers that haven't failed yet.
+    Set[str],
+] = {}
+
+# Paths, relative to the rootdir, of every file that was collected, even if no tests came from it.
+_COLLECTED_FILES: Set[str] = set()
+
+_FINGERPRINTS: Dict[
+    # The nodeid of each honoring test that was fingerprinted for the evidence cache...
+    str,
+    # ...and its fingerprint, or None if it can't be cached.
+    Optional[str],
+] = {}
+
+_CACHED: Dict[
+    # The nodeid of each honoring test whose result was reused from the evidence cache...
+    str,
+    # ...and when that result was recorded, as a Unix timestamp.
+    float,
+] = {}
+
+# With --lf, the nodeids that failed last time, copied during collection since LFPlugin forgets
+# each one as soon as it passes. None if --lf didn't narrow this session.
+_LAST_FAILED: Optional[Set[str]] = None
+
+# Constraints assigned to tests by the honors_patterns setting.
+_PATTERNS = PatternMatcher([])
+
+# The honoring tests that haven't finished running yet. Reports start once it's empty.
+_PENDING: Set[str] = set()
+
+# Renders reports in the background, if any were requested.
+_EMITTER: Optional[ReportEmitter] = None
+
+# The evidence journal for this session, if one was requested.
+_JOURNAL: Optional[EvidenceJournal] = None
+
 
 # pytest hooks
 
@@ -43,12 +126,12 @@ _RESULTS: Dict[
 
 
 def pytest_configure(config):
-    """Define the "honors" mark."""
+    """Define the "honors" mark and compile patterns."""
 
-    config.addinivalue_line(
-        "markers",
-        "honors(constraint1, constraint2, ...): mark tests as honoring one or more constraints.",
-    )
+    global _PATTERNS
+
+    config.addinivalue_line("markers", MARKER_HELP)
+    _PATTERNS = load_patterns(config)
 
 
 def pytest_addoption(parser):
@@ -62,6 +145,23 @@ def pytest_addoption(parser):
     )
     parser.addini(OPT_MARKDOWN_REPORT, report_help)
 
+    layout_help = (
+        "list each test under every constraint it honors ('full', the default), or once in a "
+        "catalog that constraints refer to ('normalized')"
+    )
+    group.addoption(
+        "--honors-report-layout",
+        action="store",
+        dest=OPT_LAYOUT,
+        choices=LAYOUTS,
+        help=layout_help,
+    )
+    parser.addini(OPT_LAYOUT, layout_help, default=LAYOUT_FULL)
+
+    json_help = "name of the JSON honored constraints report file to write (gzipped if *.gz)"
+    group.addoption("--honors-report-json", action="store", dest=OPT_JSON_REPORT, help=json_help)
+    parser.addini(OPT_JSON_REPORT, json_help)
+
     fail_help = "if set, fail tests when any constraint counts decrease"
     group.addoption(
         "--honors-regression-fail", action="store_true", dest=OPT_REGRESSION_FAIL, help=fail_help
@@ -74,30 +174,163 @@ def pytest_addoption(parser):
     )
     parser.addini(OPT_STORE_COUNTS, write_help, type="bool", default=False)
 
+    order_help = (
+        "run honoring tests before all others ('first'), also sorted by how many constraints "
+        "they honor ('weighted'), or in pytest's usual order ('none', the default)"
+    )
+    group.addoption(
+        "--honors-order", action="store", dest=OPT_ORDER, choices=ORDERS, help=order_help
+    )
+    parser.addini(OPT_ORDER, order_help, default=ORDER_NONE)
+
+    maxfail_help = "if set, stop the session once every honorer of any constraint has failed"
+    group.addoption(
+        "--honors-maxfail-constraint",
+        action="store_true",
+        default=None,
+        dest=OPT_MAXFAIL_CONSTRAINT,
+        help=maxfail_help,
+    )
+    parser.addini(OPT_MAXFAIL_CONSTRAINT, maxfail_help, type="bool", default=False)
 
-def python_sessionstart():
-    """Clear the local cache when starting a testing session."""
+    journal_help = "name of a file to stream honoring tests' results to as they run"
+    group.addoption("--honors-journal", action="store", dest=OPT_JOURNAL, help=journal_help)
+    parser.addini(OPT_JOURNAL, journal_help)
 
-    _ITEMS.clear()
+    evidence_help = "if set, skip honoring tests that passed before and haven't changed since"
+    group.addoption(
+        "--honors-evidence-cache",
+        action="store_true",
+        default=None,
+        dest=OPT_EVIDENCE_CACHE,
+        help=evidence_help,
+    )
+    parser.addini(OPT_EVIDENCE_CACHE, evidence_help, type="bool", default=False)
+
+    key_help = "extra text, like a lockfile hash, that invalidates cached evidence when it changes"
+    group.addoption("--honors-evidence-key", action="store", dest=OPT_EVIDENCE_KEY, help=key_help)
+    parser.addini(OPT_EVIDENCE_KEY, key_help, default="")
+
+    age_help = "number of seconds that cached evidence can be reused for (default: one week)"
+    group.addoption(
+        "--honors-evidence-max-age", action="store", dest=OPT_EVIDENCE_MAX_AGE, help=age_help
+    )
+    parser.addini(OPT_EVIDENCE_MAX_AGE, age_help, default=str(DEFAULT_EVIDENCE_MAX_AGE))
+
+    parser.addini(OPT_PATTERNS, PATTERNS_HELP, type="linelist")
+
+
+def pytest_sessionstart(session):
+    """Clear the local cache and publish a new index of honoring tests for this session."""
+
+    global _EMITTER, _ITEMS, _JOURNAL, _LAST_FAILED
+
+    # Build a new index rather than clearing the old one, since other plugins may still hold it.
+    _ITEMS = session.config.stash[HONORS_INDEX_KEY] = HonorsIndex()
     _RESULTS.clear()
+    _SURVIVORS.clear()
+    _COLLECTED_FILES.clear()
+    _LAST_FAILED = None
+    _FINGERPRINTS.clear()
+    _CACHED.clear()
+    evidence.source_of.cache_clear()
+    fixtures.clear()
+    _PENDING.clear()
+
+    writers = report_writers(session)
+    if writers:
+        _EMITTER = ReportEmitter(writers)
+
+    journalfile = get_config_item(session, OPT_JOURNAL)
+    if journalfile:
+        _JOURNAL = EvidenceJournal(journalfile)
+        _JOURNAL.start()
 
 
 def pytest_itemcollected(item):
     """Build a map of all seen tests that are marked as honoring constraints."""
 
-    for marker in item.own_markers:
-        # Only look at honors markers
-        if marker.name != MAGIC_MARK:
-            continue
+    for constraint in item_constraints(item, _PATTERNS):
+        _ITEMS.add(item, constraint)
 
-        for arg in marker.args:
-            # Fail loudly if there's something inside an honors clause but constraints
-            if not isinstance(arg, ConstraintsGroup):
-                raise TypeError(
-                    f"Honored constraints on {item} must be instances of ConstraintsGroup, not "
-                    f"{arg.__class__}."
-                )
-            _ITEMS.setdefault(arg.__class__, {}).setdefault(arg, []).append(item)
+
+def pytest_collectreport(report):
+    """Remember which files were collected, including ones that no tests came from."""
+
+    if report.passed and report.nodeid and "::" not in report.nodeid:
+        _COLLECTED_FILES.add(report.nodeid)
+
+
+@hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    """Skip honoring tests with cached evidence, then move the rest to the front if asked to."""
+
+    global _LAST_FAILED
+    _LAST_FAILED = last_failed(config, items)
+
+    if get_config_item(session, OPT_EVIDENCE_CACHE):
+        reuse_evidence(session, config, items)
+
+    order = get_config_item(session, OPT_ORDER) or ORDER_NONE
+    if order not in ORDERS:
+        raise UsageError(f"{OPT_ORDER} must be one of {', '.join(ORDERS)}, not {order!r}")
+    if order == ORDER_NONE:
+        return
+
+    # Sorting is stable, so tests keep their relative order within each bucket.
+    if order == ORDER_FIRST:
+        items.sort(key=lambda item: not _ITEMS.constraints_for(item))
+    else:
+        items.sort(key=lambda item: -len(_ITEMS.constraints_for(item)))
+
+
+def pytest_collection_finish(session):
+    """Freeze the index now that every test has been collected and selected."""
+
+    _ITEMS.select(session.items)
+    _ITEMS.freeze()
+
+    if _JOURNAL is not None:
+        _JOURNAL.index(_ITEMS)
+
+        for nodeid in sorted(_CACHED):
+            _JOURNAL.result(nodeid, _RESULTS[nodeid])
+
+    if get_config_item(session, OPT_MAXFAIL_CONSTRAINT):
+        for item in session.items:
+            for constraint in _ITEMS.constraints_for(item):
+                _SURVIVORS.setdefault(constraint, set()).add(item.nodeid)
+        # Cached evidence can't fail, so constraints that have some can never lose it all.
+        for nodeid in _CACHED:
+            for constraint in _ITEMS.constraints_for(nodeid):
+                _SURVIVORS.pop(constraint, None)
+
+    if _EMITTER is not None:
+        _PENDING.update(_ITEMS.selected - _CACHED.keys())
+        if not _PENDING:
+            start_reports()
+
+
+@hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item):
+    """Stop the session when a constraint has lost all of its evidence, if asked to."""
+
+    outcome = yield
+    report = outcome.get_result()
+    # A test whose call passed is evidence, even if tearing down its fixtures failed afterward.
+    if not (_SURVIVORS and report.failed and report.when in {"setup", "call"}):
+        return
+
+    for constraint in _ITEMS.constraints_for(item):
+        survivors = _SURVIVORS.get(constraint)
+        if survivors is None:
+            continue
+        survivors.discard(item.nodeid)
+        if not survivors:
+            item.session.shouldfail = (
+                f"every honorer of {constraint_key(constraint)} failed "
+                f"(--honors-maxfail-constraint)"
+            )
 
 
 def pytest_report_teststatus(report):
@@ -108,25 +341,157 @@ def pytest_report_teststatus(report):
         _RESULTS[report.nodeid] = report.outcome
 
 
+def pytest_runtest_logreport(report):
+    """Stream honoring tests' results to the journal, and start reports after the last one."""
+
+    if _JOURNAL is not None and _ITEMS.constraints_for(report.nodeid):
+        if report.when == "call":
+            _JOURNAL.result(report.nodeid, report.outcome)
+        elif report.when == "setup" and report.failed:
+            # The test never ran, but it didn't just go missing, either.
+            _JOURNAL.result(report.nodeid, SETUP_ERROR)
+
+    if _PENDING and report.when == "teardown" and report.nodeid in _PENDING:
+        _PENDING.discard(report.nodeid)
+        if not _PENDING:
+            start_reports()
+
+
+@hookimpl(trylast=True)
 def pytest_sessionfinish(session, exitstatus):
     """Report on or validate constraints coverage."""
 
-    if exitstatus not in {ExitCode.OK, ExitCode.TESTS_FAILED}:
+    global _EMITTER, _JOURNAL
+
+    # Close the journal first, even if the session was interrupted, since recovering from those
+    # sessions is what it's for.
+    if _JOURNAL is not None:
+        _JOURNAL.finish(exitstatus)
+        _JOURNAL.close()
+        _JOURNAL = None
+
+    if exitstatus == ExitCode.NO_TESTS_COLLECTED and _CACHED:
+        # Every selected test's evidence came from the cache, which is a success.
+        exitstatus = session.exitstatus = ExitCode.OK
+
+    succeeded = exitstatus in {ExitCode.OK, ExitCode.TESTS_FAILED}
+    if _EMITTER is not None:
+        emitter, _EMITTER = _EMITTER, None
+        if succeeded:
+            # Reports are rendered on other threads, so warn about what they'll leave out here.
+            warn_missing_results(_ITEMS, _RESULTS)
+            # This does nothing if the reports were already started after the last honorer ran.
+            emitter.start(_ITEMS, dict(_RESULTS), dict(_CACHED))
+        emitter.finish(commit=succeeded)
+
+    if not succeeded:
         return
 
-    reportfile = get_config_item(session, OPT_MARKDOWN_REPORT)
-    if reportfile:
-        with open(reportfile, "w") as outfile:
-            for line in render_as_markdown(_ITEMS, _RESULTS):
-                outfile.write(line + "\n")
+    if _FINGERPRINTS:
+        store_evidence(session)
+
+    regression_fail = get_config_item(session, OPT_REGRESSION_FAIL)
+    store_counts = get_config_item(session, OPT_STORE_COUNTS)
+    if not (regression_fail or store_counts):
+        return
+
+    old_honorers = session.config.cache.get(CACHE_KEY_HONORERS, {})
+    unseen = unseen_honorers(session, old_honorers)
+    honorers, in_scope = merge_honorers(
+        old_honorers, make_honorers(_ITEMS), unseen, _ITEMS.selected
+    )
+    new_counts = {key: len(nodeids) for key, nodeids in honorers.items()}
 
-    new_counts = make_counts(_ITEMS)
-    if get_config_item(session, OPT_REGRESSION_FAIL):
+    if regression_fail:
         old_counts = get_old_counts(session)
+        if old_honorers:
+            # Only compare constraints that this session could actually see. Caches from before
+            # honorers were stored don't say where the old honorers were, so compare everything.
+            old_counts = {key: count for key, count in old_counts.items() if key in in_scope}
         fail_on_regressions(old_counts, new_counts)
 
-    if get_config_item(session, OPT_STORE_COUNTS):
+    if store_counts:
         session.config.cache.set(CACHE_KEY_COUNTS, new_counts)
+        session.config.cache.set(CACHE_KEY_HONORERS, honorers)
+
+
+def report_writers(session):
+    """Return the path and renderer of each report requested for this session."""
+
+    writers = []
+    reportfile = get_config_item(session, OPT_MARKDOWN_REPORT)
+    if reportfile:
+        layout = get_config_item(session, OPT_LAYOUT) or LAYOUT_FULL
+        if layout not in LAYOUTS:
+            raise UsageError(f"{OPT_LAYOUT} must be one of {', '.join(LAYOUTS)}, not {layout!r}")
+        if layout == LAYOUT_NORMALIZED:
+            render = partial(render_markdown_lines, renderer=render_as_normalized_markdown)
+        else:
+            render = render_markdown_lines
+        writers.append((reportfile, render))
+    jsonfile = get_config_item(session, OPT_JSON_REPORT)
+    if jsonfile:
+        writers.append((jsonfile, render_as_json))
+    return writers
+
+
+def start_reports():
+    """Start rendering reports in the background now that every honoring test has finished."""
+
+    _EMITTER.start(_ITEMS, dict(_RESULTS), dict(_CACHED))  # type: ignore
+
+
+@fixture(scope="session")
+def honors_index(request):
+    """Return the frozen HonorsIndex of the tests in this session."""
+
+    return request.config.stash[HONORS_INDEX_KEY]
+
+
+def reuse_evidence(session, config, items):
+    """Deselect unchanged honoring tests that passed recently, and reuse their results."""
+
+    extra_key = get_config_item(session, OPT_EVIDENCE_KEY) or ""
+    max_age = float(get_config_item(session, OPT_EVIDENCE_MAX_AGE) or DEFAULT_EVIDENCE_MAX_AGE)
+    entries = config.cache.get(CACHE_KEY_EVIDENCE, {})
+
+    remaining = []
+    cached = []
+    for item in items:
+        if not _ITEMS.constraints_for(item):
+            remaining.append(item)
+            continue
+        fingerprint = _FINGERPRINTS[item.nodeid] = evidence.fingerprint(item, extra_key)
+        cached_at = fingerprint and evidence.cached_result(
+            entries.get(item.nodeid), fingerprint, max_age
+        )
+        if cached_at:
+            _RESULTS[item.nodeid] = entries[item.nodeid]["outcome"]
+            _CACHED[item.nodeid] = cached_at
+            cached.append(item)
+        else:
+            remaining.append(item)
+
+    if cached:
+        config.hook.pytest_deselected(items=cached)
+        items[:] = remaining
+
+
+def store_evidence(session):
+    """Remember the fingerprints and outcomes of the honoring tests that ran this session."""
+
+    entries = session.config.cache.get(CACHE_KEY_EVIDENCE, {})
+    now = time.time()
+    for nodeid, fingerprint in _FINGERPRINTS.items():
+        if nodeid in _CACHED:
+            continue
+        outcome = _RESULTS.get(nodeid)
+        if fingerprint and outcome in evidence.REUSABLE_OUTCOMES:
+            entries[nodeid] = {"fingerprint": fingerprint, "outcome": outcome, "time": now}
+        elif nodeid in _RESULTS:
+            # It ran and didn't pass, so make sure it runs next time, too.
+            entries.pop(nodeid, None)
+    session.config.cache.set(CACHE_KEY_EVIDENCE, entries)
 
 
 def get_old_counts(session):
@@ -139,12 +504,45 @@ def make_counts(items):
     """Return a dict of string constraint names to the count of their honorers."""
 
     return {
-        f"{constraint.__class__.__name__}.{constraint.name}": len(tests)
+        constraint_key(constraint): len(tests)
+        for group_members in items.values()
+        for constraint, tests in group_members.items()
+    }
+
+
+def make_honorers(items):
+    """Return a dict of string constraint names to the sorted nodeids of their honorers."""
+
+    return {
+        constraint_key(constraint): sorted(test.nodeid for test in tests)
         for group_members in items.values()
         for constraint, tests in group_members.items()
     }
 
 
+def merge_honorers(old_honorers, new_honorers, unseen, selected):
+    """Return the honorers to compare and store after a possibly partial run, and their scope.
+
+    Previous honorers that this session didn't look for, like those left out with --lf or by
+    naming specific paths, can't have changed as far as we know, so they're carried forward from
+    the previous run. A constraint is in scope when one of its current honorers was selected to
+    run, or when this session looked for one of its previous honorers.
+    """
+
+    merged = {}
+    in_scope = set()
+    for key in old_honorers.keys() | new_honorers.keys():
+        new = set(new_honorers.get(key, ()))
+        old = old_honorers.get(key, ())
+        carried = {nodeid for nodeid in old if nodeid in unseen}
+        if not new.isdisjoint(selected) or len(carried) < len(old):
+            in_scope.add(key)
+        nodeids = new | carried
+        if nodeids:
+            merged[key] = sorted(nodeids)
+    return merged, in_scope
+
+
 def fail_on_regressions(old_counts, new_counts):
     """Raise a ValueError if any constraint's honorers count decreased from the previous run."""
 
@@ -159,8 +557,11 @@ def fail_on_regressions(old_counts, new_counts):
         raise ValueError(sorted(errors))
 
 
-def render_as_markdown(items, results):
-    """Yield markdown lines of a report on the given items and their results."""
+def render_as_markdown(items, results, cached=None):
+    """Yield markdown lines of a report on the given items and their results.
+
+    cached maps the nodeids of results reused from the evidence cache to when they were recorded.
+    """
 
     first = True
     for constraint_group, group_members in sorted(items.items(), key=key__name__):
@@ -180,26 +581,300 @@ def render_as_markdown(items, results):
             yield "Supporting evidence:"
             yield ""
             for test in sorted(tests, key=attrgetter("name")):
-                try:
-                    result = results[test.nodeid]
-                except KeyError:
-                    test.warn(
-                        PytestWarning(
-                            "An honoring node can't be included in the report because it failed."
-                        )
-                    )
+                # Tests without results were warned about by warn_missing_results.
+                result = results.get(test.nodeid)
+                if result is None:
                     continue
-                if result != "passed":
-                    result = f"**{result}**"
+                result = markdown_result(result, (cached or {}).get(test.nodeid))
                 yield f"- Name: {test.name}"
                 yield f'  Explanation: "{test.obj.__doc__}"'
                 yield f"  Path: {test.nodeid}"
                 yield f"  Result: {result}"
 
 
+def render_as_json(items, results, cached=None):
+    """Yield chunks of a JSON report on the given items and their results.
+
+    The report is one object with these keys:
+
+    - "schema" and "version": identify this format.
+    - "groups": a list of constraint groups, each with its "name", "doc", and "constraints".
+      Each constraint has its "key" (as used in "counts"), "name", "value", and "tests" honoring
+      it. Each test has its "name", "nodeid", "doc", and "outcome", which is null if it never ran.
+      Tests whose outcome was reused from the evidence cache also have "cached_at", the time it
+      was recorded in ISO 8601 format, which is null for everything else.
+    - "counts": the number of honorers of each constraint, by key.
+
+    Each group is encoded separately, so the whole report is never held in memory at once.
+    """
+
+    yield (
+        f'{{"schema": {json.dumps(JSON_REPORT_SCHEMA)}, "version": {JSON_REPORT_VERSION}, '
+        f'"groups": ['
+    )
+    counts = {}
+    first = True
+    for constraint_group, group_members in sorted(items.items(), key=key__name__):
+        constraints = []
+        for constraint, tests in sorted(group_members.items(), key=key_name):
+            key = constraint_key(constraint)
+            counts[key] = len(tests)
+            constraints.append(
+                {
+                    "key": key,
+                    "name": constraint.name,
+                    "value": constraint.value,
+                    "tests": [
+                        {
+                            "name": test.name,
+                            "nodeid": test.nodeid,
+                            "doc": test.obj.__doc__,
+                            "outcome": results.get(test.nodeid),
+                            "cached_at": cached_at(test.nodeid, cached),
+                        }
+                        for test in sorted(tests, key=attrgetter("name"))
+                    ],
+                }
+            )
+        group = {
+            "name": constraint_group.__name__,
+            "doc": constraint_group.__doc__,
+            "constraints": constraints,
+        }
+        yield ("" if first else ", ") + json.dumps(group)
+        first = False
+    yield f'], "counts": {json.dumps(counts, sort_keys=True)}}}\n'
+
+
+def render_as_normalized_markdown(items, results, cached=None):
+    """Yield markdown lines of a report that lists each test once, however many it honors.
+
+    A catalog of tests comes first, each with a short ID like T1. Each constraint's section then
+    refers to its honorers by ID.
+    """
+
+    # Build the table of distinct tests in one pass over the index, noting what each honors.
+    table = {}
+    for group_members in items.values():
+        for constraint, tests in group_members.items():
+            for test in tests:
+                table.setdefault(test.nodeid, (test, []))[1].append(constraint)
+
+    refs = {}
+    catalog = []
+    for nodeid, (test, constraints) in sorted(
+        table.items(), key=lambda entry: (entry[1][0].name, entry[0])
+    ):
+        # Tests without results were warned about by warn_missing_results.
+        result = results.get(nodeid)
+        if result is None:
+            continue
+        test_id = f"T{len(catalog) + 1}"
+        catalog.append((test_id, test, markdown_result(result, (cached or {}).get(nodeid))))
+        # Tests are visited in ID order, so each constraint's references come out sorted.
+        for constraint in constraints:
+            refs.setdefault(constraint, []).append(test_id)
+
+    yield ""
+    yield "# Tests"
+    for test_id, test, result in catalog:
+        yield ""
+        yield f'- ID: <a id="{test_id.lower()}"></a>{test_id}'
+        yield f"  Name: {test.name}"
+        yield f'  Explanation: "{test.obj.__doc__}"'
+        yield f"  Path: {test.nodeid}"
+        yield f"  Result: {result}"
+
+    for constraint_group, group_members in sorted(items.items(), key=key__name__):
+        yield ""
+        yield "---"
+        yield ""
+        constraint_group_doc = constraint_group.__doc__.split("\n")[0]  # type: ignore
+        yield f"# {constraint_group.__name__} - {constraint_group_doc}"
+
+        for constraint in sorted(group_members, key=attrgetter("name")):
+            links = ", ".join(
+                f"[{test_id}](#{test_id.lower()})" for test_id in refs.get(constraint, ())
+            )
+            yield ""
+            yield f"## {constraint.name}: {constraint.value}"
+            yield ""
+            yield f"Supporting evidence: {links or 'none'}"
+
+
+def warn_missing_results(items, results):
+    """Warn about each honoring test that has no result to report, like one that failed setup."""
+
+    warned = set()
+    for group_members in items.values():
+        for tests in group_members.values():
+            for test in tests:
+                if test.nodeid in results or test.nodeid in warned:
+                    continue
+                warned.add(test.nodeid)
+                test.warn(
+                    PytestWarning(
+                        "An honoring node can't be included in the report because it failed."
+                    )
+                )
+
+
+def render_markdown_lines(items, results, cached=None, renderer=render_as_markdown):
+    """Yield the lines of a markdown report, each ending with a newline."""
+
+    for line in renderer(items, results, cached):
+        yield line + "\n"
+
+
 # Helpers
 
 
+def markdown_result(result, cached_at=None):
+    """Return a result as markdown reports show it: bold unless it passed, labeled if cached."""
+
+    if result != "passed":
+        return f"**{result}**"
+    if cached_at is not None:
+        return f"{result} ({evidence.cached_label(cached_at)})"
+    return result
+
+
+def cached_at(nodeid, cached):
+    """Return when the nodeid's cached result was recorded, in ISO 8601 format, or None."""
+
+    when = (cached or {}).get(nodeid)
+    return None if when is None else evidence.iso_time(when)
+
+
+def load_patterns(config):
+    """Return a PatternMatcher for the honors_patterns setting, or a UsageError if it's bad."""
+
+    try:
+        return PatternMatcher(config.getini(OPT_PATTERNS))
+    except ValueError as exc:
+        raise UsageError(str(exc)) from None
+
+
+def item_constraints(item, patterns=None):
+    """Yield each constraint that the given item is marked as honoring.
+
+    This includes the constraints assigned to its nodeid by the given PatternMatcher, if any, the
+    constraints honored by fixtures it uses, and the constraints that any of those map to through
+    CROSSWALKS.
+    """
+
+    for marker in item.own_markers:
+        # Only look at honors markers
+        if marker.name != MAGIC_MARK:
+            continue
+
+        for arg in marker.args:
+            # Fail loudly if there's something inside an honors clause but constraints
+            if not isinstance(arg, ConstraintsGroup):
+                raise TypeError(
+                    f"Honored constraints on {item} must be instances of ConstraintsGroup, not "
+                    f"{arg.__class__}."
+                )
+            yield arg
+            yield from CROSSWALKS.resolve(arg)
+
+    if patterns:
+        try:
+            matched = patterns.match(item.nodeid)
+        except ValueError as exc:
+            raise UsageError(f"Can't apply {OPT_PATTERNS} to {item.nodeid}: {exc}") from None
+        for constraint in matched:
+            yield constraint
+            yield from CROSSWALKS.resolve(constraint)
+
+    # These already include their crosswalked constraints.
+    yield from fixtures.fixture_constraints(item)
+
+
+def nodeid_file(nodeid):
+    """Return the file part of a nodeid, like 'tests/test_honors.py'."""
+
+    return nodeid.split("::", 1)[0]
+
+
+def unseen_honorers(session, honorers):
+    """Return the nodeids of the given honorers that this session didn't look for.
+
+    An honorer was looked for if its file was collected in full, or if it was one of the nodes
+    asked for in a file that was only partly collected. Honorers in deleted files were looked for,
+    too, since they're certainly gone.
+    """
+
+    narrowed = narrowed_files(session)
+    rootpath = session.config.rootpath
+    unseen = set()
+    for nodeids in honorers.values():
+        for nodeid in nodeids:
+            path = nodeid_file(nodeid)
+            if path in _COLLECTED_FILES:
+                prefixes = narrowed.get(path)
+                if prefixes is None or any(is_node_in(nodeid, prefix) for prefix in prefixes):
+                    continue
+            elif not (rootpath / path).exists():
+                continue
+            unseen.add(nodeid)
+    return unseen
+
+
+def narrowed_files(session):
+    """Return the files that were only partly collected, mapped to the nodeids asked for in each.
+
+    Arguments like ``tests/test_a.py::test_one`` narrow their file to the named nodes, unless the
+    whole file was asked for, too. With --lf, every file is narrowed to its previously failed
+    tests, since the rest of them are skipped without saying so.
+    """
+
+    config = session.config
+    narrowed: Dict[str, Set[str]] = {}
+    whole = set()
+    for arg in config.args:
+        path, separator, node = str(arg).partition("::")
+        try:
+            path = (config.invocation_params.dir / path).resolve().relative_to(config.rootpath)
+        except ValueError:
+            continue
+        path = path.as_posix()
+        if separator:
+            narrowed.setdefault(path, set()).add(f"{path}::{node}")
+        else:
+            whole.add(path)
+    for path in whole:
+        narrowed.pop(path, None)
+
+    if _LAST_FAILED is not None:
+        for path in _COLLECTED_FILES:
+            narrowed.setdefault(path, set())
+        for nodeid in _LAST_FAILED:
+            narrowed.setdefault(nodeid_file(nodeid), set()).add(nodeid)
+    return narrowed
+
+
+def last_failed(config, items):
+    """Return the nodeids that --lf narrowed the collected items to, or None if it didn't.
+
+    --lf runs everything when none of the collected items failed last time, and --ff keeps the
+    tests that passed, so neither of those narrows anything.
+    """
+
+    lfplugin = config.pluginmanager.get_plugin("lfplugin")
+    if lfplugin is None or not config.getoption("lf"):
+        return None
+    if not any(item.nodeid in lfplugin.lastfailed for item in items):
+        return None
+    return set(lfplugin.lastfailed)
+
+
+def is_node_in(nodeid, prefix):
+    """Return True if the nodeid is the node named by prefix or one of its children."""
+
+    return nodeid == prefix or nodeid.startswith((prefix + "::", prefix + "["))
+
+
 def get_config_item(session, name):
     """Return the given config item from either the command line or pytest.ini"""
 
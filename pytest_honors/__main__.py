@@ -0,0 +1,113 @@
+"""Command line tools for working with honored constraints outside of a test run."""
+
+import argparse
+import json
+import sys
+
+
+def main(argv=None):
+    """Parse the command line and run the requested command."""
+
+    parser = argparse.ArgumentParser(prog="python -m pytest_honors", description=__doc__)
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    watch = commands.add_parser(
+        "watch", help="keep the honors index in memory and re-report whenever test files change"
+    )
+    watch.add_argument("paths", nargs="*", help="files or directories to collect tests from")
+    watch.add_argument("--report", help="name of the honored constraints report file to write")
+    watch.add_argument(
+        "--interval", type=float, default=0.5, help="seconds between checks for changed files"
+    )
+    watch.set_defaults(func=run_watch)
+
+    recover = commands.add_parser(
+        "recover", help="rebuild the report and counts from a possibly unfinished run's journal"
+    )
+    recover.add_argument("journal", help="journal file written by --honors-journal")
+    recover.add_argument(
+        "--report-markdown", help="name of the honored constraints report file to write"
+    )
+    recover.set_defaults(func=run_recover)
+
+    analyze = commands.add_parser(
+        "analyze", help="find redundant tests and overlapping constraints in a JSON report"
+    )
+    analyze.add_argument("report", help="report file written by --honors-report-json")
+    analyze.add_argument(
+        "--top", type=int, default=10, help="how many constraints and pairs to list"
+    )
+    analyze.add_argument(
+        "--min-jaccard",
+        type=float,
+        default=0.5,
+        help="only list pairs of constraints whose honorers overlap at least this much",
+    )
+    analyze.set_defaults(func=run_analyze)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+def run_watch(args):
+    """Watch the given paths until interrupted."""
+
+    from .watch import Watcher
+
+    Watcher(args.paths, report=args.report, interval=args.interval).run()
+    return 0
+
+
+def run_recover(args):
+    """Print the counts from a journal, and write its report if asked to."""
+
+    from . import make_counts, render_as_markdown
+    from .journal import recover
+
+    recovered = recover(args.journal)
+    if args.report_markdown:
+        with open(args.report_markdown, "w") as outfile:
+            for line in render_as_markdown(recovered.items, recovered.results):
+                outfile.write(line + "\n")
+
+    if recovered.exitstatus is None:
+        print("honors: the journaled session never finished", file=sys.stderr)
+    else:
+        print(f"honors: the journaled session exited with {recovered.exitstatus}", file=sys.stderr)
+    json.dump(make_counts(recovered.items), sys.stdout, indent=2, sort_keys=True)
+    print()
+    return 0
+
+
+def run_analyze(args):
+    """Print a summary of how the tests in a JSON report cover their constraints."""
+
+    from .matrix import CoverageMatrix
+
+    matrix = CoverageMatrix.from_json_report(args.report)
+    tests, constraints = matrix.shape
+    print(f"{tests} tests honor {constraints} constraints in {matrix.nnz} pairs")
+
+    print(f"\nMost honored constraints (top {args.top}):")
+    counts = matrix.column_counts()
+    for column in sorted(range(constraints), key=lambda column: -counts[column])[: args.top]:
+        print(f"  {counts[column]:6}  {matrix.constraints[column]}")
+
+    print(f"\nOverlapping constraints (Jaccard >= {args.min_jaccard}, top {args.top}):")
+    for overlap in matrix.overlaps(args.min_jaccard, args.top):
+        print(
+            f"  {overlap.jaccard:6.2f}  {overlap.first} & {overlap.second} "
+            f"({overlap.shared} shared)"
+        )
+
+    subsumed = matrix.subsumed()
+    print(f"\nTests whose constraints another test also honors ({len(subsumed)}):")
+    for test in subsumed:
+        relation = "duplicates" if test.duplicate else "is covered by"
+        print(f"  {test.test} {relation} {test.by}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,10 @@
 """Constraints definitions."""
 
 import enum
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional, Set, Union
+
+# A crosswalk mapping's values are either one constraint or an iterable of them.
+CrosswalkTargets = Union["ConstraintsGroup", Iterable["ConstraintsGroup"]]
 
 
 class ConstraintsGroup(enum.Enum):
@@ -8,3 +12,88 @@ class ConstraintsGroup(enum.Enum):
 
     Although this is currently just an Enum, always inherit from this class instead of directly
     from Enum. It is very likely that new behavior will be added here in the near future."""
+
+    @classmethod
+    def crosswalk(cls, mapping: Mapping["ConstraintsGroup", CrosswalkTargets]):
+        """Declare that honoring each of this group's constraints also honors the mapped ones.
+
+        For example, ``ISO27001Controls.crosswalk({ISO27001Controls.A_12_5_3: [SOC2.CC8_1]})``
+        makes every test that honors A_12_5_3 count toward CC8_1, too.
+        """
+
+        for source in mapping:
+            if not isinstance(source, cls):
+                raise TypeError(f"{source!r} is not a member of {cls.__name__}")
+        CROSSWALKS.update(mapping)
+
+
+class Crosswalk:
+    """A many-to-many mapping from constraints to the other constraints they also honor.
+
+    Mappings are declared one hop at a time and compiled into a lookup table the first time
+    they're needed, so resolving a constraint during collection is a single dict lookup. The table
+    follows chains of mappings: if A maps to B and B maps to C, then honoring A honors C.
+    """
+
+    def __init__(self):
+        self._edges: Dict[ConstraintsGroup, Set[ConstraintsGroup]] = {}
+        self._table: Optional[Dict[ConstraintsGroup, FrozenSet[ConstraintsGroup]]] = None
+
+    def map(self, source: ConstraintsGroup, *targets: ConstraintsGroup):
+        """Declare that honoring the source constraint also honors each of the targets."""
+
+        for constraint in (source,) + targets:
+            if not isinstance(constraint, ConstraintsGroup):
+                raise TypeError(
+                    f"Crosswalked constraints must be instances of ConstraintsGroup, not "
+                    f"{constraint.__class__}."
+                )
+        self._edges.setdefault(source, set()).update(targets)
+        self._table = None
+
+    def update(self, mapping: Mapping[ConstraintsGroup, CrosswalkTargets]):
+        """Map each key of the dict to its value, which is a constraint or an iterable of them."""
+
+        for source, targets in mapping.items():
+            if isinstance(targets, ConstraintsGroup):
+                targets = (targets,)
+            self.map(source, *targets)
+
+    def clear(self):
+        """Forget every mapping."""
+
+        self._edges.clear()
+        self._table = None
+
+    def compile(self) -> Dict[ConstraintsGroup, FrozenSet[ConstraintsGroup]]:
+        """Build the table of every constraint reachable from each source constraint."""
+
+        table = {}
+        for source in self._edges:
+            seen: Set[ConstraintsGroup] = set()
+            pending = list(self._edges[source])
+            while pending:
+                constraint = pending.pop()
+                if constraint in seen or constraint is source:
+                    continue
+                seen.add(constraint)
+                pending.extend(self._edges.get(constraint, ()))
+            table[source] = frozenset(seen)
+        self._table = table
+        return table
+
+    def resolve(self, constraint: ConstraintsGroup) -> FrozenSet[ConstraintsGroup]:
+        """Return the other constraints honored by anything honoring the given constraint."""
+
+        table = self._table
+        if table is None:
+            table = self.compile()
+        return table.get(constraint, frozenset())
+
+    def __bool__(self) -> bool:
+        return bool(self._edges)
+
+
+# The crosswalks applied while collecting tests. Add to it with ConstraintsGroup.crosswalk, or
+# with CROSSWALKS.map and CROSSWALKS.update, before collection starts (e.g. in conftest.py).
+CROSSWALKS = Crosswalk()
@@ -0,0 +1,87 @@
+"""Write reports in the background while the rest of the session finishes."""
+
+import gzip
+import os
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+
+# Report files are written through a buffer this big, so even line-at-a-time renderers only make
+# a few system calls.
+BUFFER_SIZE = 1 << 20
+
+# A report's destination path, and a function taking the report's inputs and yielding chunks.
+Writer = Tuple[str, Callable[..., Iterable[str]]]
+
+
+def open_report(path: str, compress: Optional[bool] = None):
+    """Open a report file for writing text, compressing it with gzip if its name ends in .gz."""
+
+    if compress is None:
+        compress = path.endswith(".gz")
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8", buffering=BUFFER_SIZE)
+
+
+def write_temp(path: str, render: Callable[..., Iterable[str]], *inputs) -> str:
+    """Render a report into a temporary file next to its destination and return the temp path."""
+
+    directory, filename = os.path.split(os.path.abspath(path))
+    temp_path = os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open_report(temp_path, compress=path.endswith(".gz")) as outfile:
+            outfile.writelines(render(*inputs))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return temp_path
+
+
+class ReportEmitter:
+    """Render reports on a small pool of worker threads, then move them into place.
+
+    Reports are started as soon as their inputs are final, which is usually well before the
+    session ends. Each is written to a temporary file, and finish() renames them all into place
+    at once, or throws them away if the session didn't end well enough to report on.
+    """
+
+    def __init__(self, writers: Iterable[Writer], max_workers: int = 2):
+        self.writers = list(writers)
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="honors-report")
+        self._jobs: List[Tuple[str, Future]] = []
+        self.started = False
+
+    def start(self, *inputs):
+        """Start rendering each report from the given inputs. Only the first call does anything."""
+
+        if self.started:
+            return
+        self.started = True
+        for path, render in self.writers:
+            future = self._executor.submit(write_temp, path, render, *inputs)
+            self._jobs.append((path, future))
+
+    def finish(self, commit: bool = True):
+        """Wait for every report, then move them into place if commit is True.
+
+        If any report failed, none are moved into place and the first error is raised.
+        """
+
+        done = []
+        errors = []
+        for path, future in self._jobs:
+            try:
+                done.append((path, future.result()))
+            except Exception as exc:
+                errors.append(exc)
+        self._executor.shutdown()
+
+        for path, temp_path in done:
+            if commit and not errors:
+                os.replace(temp_path, path)
+            else:
+                os.unlink(temp_path)
+        if errors:
+            raise errors[0]
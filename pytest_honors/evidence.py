@@ -0,0 +1,70 @@
+"""Fingerprint honoring tests so their previous results can be reused while they're unchanged."""
+
+import hashlib
+import inspect
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Optional
+
+# Bump this to invalidate every stored fingerprint, like when the recipe below changes.
+FINGERPRINT_VERSION = "1"
+
+# Only these outcomes are ever reused. Failing tests always run again.
+REUSABLE_OUTCOMES = {"passed"}
+
+
+@lru_cache(maxsize=None)
+def source_of(obj) -> str:
+    """Return the source code of a function or module, remembering it for the next test."""
+
+    return inspect.getsource(obj)
+
+
+def fingerprint(item, extra_key: str = "") -> Optional[str]:
+    """Return a hash of everything that could change the given test's result.
+
+    That's the source of the test function, of the module it's in, and of each fixture in its
+    closure, plus an extra key supplied by the user, like a hash of the dependency lockfile. If
+    any of the source can't be found, return None to say that the test can't be cached.
+    """
+
+    digest = hashlib.sha256()
+    digest.update(FINGERPRINT_VERSION.encode())
+    digest.update(extra_key.encode())
+    digest.update(item.nodeid.encode())
+    try:
+        digest.update(source_of(item.obj).encode())
+        digest.update(source_of(item.module).encode())
+        name2fixturedefs = item._fixtureinfo.name2fixturedefs
+        for name in sorted(item.fixturenames):
+            for fixturedef in name2fixturedefs.get(name, ()):
+                digest.update(name.encode())
+                digest.update(source_of(fixturedef.func).encode())
+    except (AttributeError, OSError, TypeError):
+        return None
+    return digest.hexdigest()
+
+
+def cached_result(entry: Optional[Dict], fingerprint: str, max_age: float) -> Optional[float]:
+    """Return when a stored entry's result was recorded if it can be reused, or else None."""
+
+    if not entry or entry.get("fingerprint") != fingerprint:
+        return None
+    if entry.get("outcome") not in REUSABLE_OUTCOMES:
+        return None
+    if time.time() - entry.get("time", 0) > max_age:
+        return None
+    return entry["time"]
+
+
+def cached_label(when: float) -> str:
+    """Return how reports label a result reused from the given time."""
+
+    return f"cached from {datetime.fromtimestamp(when, timezone.utc):%Y-%m-%d %H:%M} UTC"
+
+
+def iso_time(when: float) -> str:
+    """Return the given time as an ISO 8601 string in UTC, to the second."""
+
+    return datetime.fromtimestamp(when, timezone.utc).isoformat(timespec="seconds")
@@ -0,0 +1,88 @@
+"""Let fixtures honor constraints on behalf of every test that uses them."""
+
+from typing import Dict, Tuple
+
+from .constraints import CROSSWALKS, ConstraintsGroup
+
+# The attribute that the honors decorator stores a fixture function's constraints in.
+HONORS_ATTR = "__honors__"
+
+_MEMO: Dict[
+    # A FixtureDef and its scope...
+    Tuple[object, str],
+    # ...and the constraints that every test using it honors, including crosswalked ones.
+    Tuple[ConstraintsGroup, ...],
+] = {}
+
+
+def honors(*constraints: ConstraintsGroup):
+    """Decorate a fixture function so that every test using the fixture honors the constraints.
+
+    Use it below ``@pytest.fixture``::
+
+        @pytest.fixture
+        @honors(MyControls.DataIsEncryptedAtRest)
+        def encrypted_db():
+            ...
+    """
+
+    for constraint in constraints:
+        if not isinstance(constraint, ConstraintsGroup):
+            raise TypeError(
+                f"Honored constraints must be instances of ConstraintsGroup, not "
+                f"{constraint.__class__}."
+            )
+
+    def decorator(func):
+        honored = getattr(func, HONORS_ATTR, ()) + constraints
+        setattr(func, HONORS_ATTR, honored)
+        # If this was used above @pytest.fixture instead of below it, also mark the function that
+        # pytest will actually call.
+        wrapped = getattr(func, "__wrapped__", None)
+        if wrapped is not None:
+            setattr(wrapped, HONORS_ATTR, honored)
+        return func
+
+    return decorator
+
+
+def fixture_constraints(item):
+    """Yield the constraints honored by the fixtures in the item's fixture closure."""
+
+    fixtureinfo = getattr(item, "_fixtureinfo", None)
+    if fixtureinfo is None:
+        return
+    name2fixturedefs = fixtureinfo.name2fixturedefs
+    for name in item.fixturenames:
+        fixturedefs = name2fixturedefs.get(name)
+        if not fixturedefs:
+            continue
+        # The last definition is the one the item sees. A fixture that overrides another of the
+        # same name and requests it also pulls in the one it overrides, and so on.
+        index = len(fixturedefs) - 1
+        while index >= 0:
+            fixturedef = fixturedefs[index]
+            yield from fixturedef_constraints(fixturedef)
+            if name not in fixturedef.argnames:
+                break
+            index -= 1
+
+
+def fixturedef_constraints(fixturedef) -> Tuple[ConstraintsGroup, ...]:
+    """Return the constraints honored by one fixture definition, computing them only once."""
+
+    key = (fixturedef, fixturedef.scope)
+    constraints = _MEMO.get(key)
+    if constraints is None:
+        honored = []
+        for constraint in getattr(fixturedef.func, HONORS_ATTR, ()):
+            honored.append(constraint)
+            honored.extend(CROSSWALKS.resolve(constraint))
+        constraints = _MEMO[key] = tuple(honored)
+    return constraints
+
+
+def clear():
+    """Forget the memoized constraints of every fixture definition."""
+
+    _MEMO.clear()
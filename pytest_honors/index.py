@@ -0,0 +1,199 @@
+"""An index of which tests honor which constraints, searchable in both directions."""
+
+import enum
+from collections import abc
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from .constraints import ConstraintsGroup
+
+
+class HonorsIndex(abc.Mapping):
+    """Map constraint groups to their constraints, and those constraints to their honorers.
+
+    As a Mapping, an index looks like ``{ConstraintsGroup subclass: {constraint: [items]}}``, which
+    is the shape that make_counts and render_as_markdown expect. It also answers "which
+    constraints does this item honor?" and "which items honor this constraint?" with a single
+    dict lookup each.
+
+    The plugin builds one index per session as tests are collected, then freezes it when
+    collection finishes. Other plugins can get it from ``config.stash[HONORS_INDEX_KEY]``, and
+    tests can use the ``honors_index`` fixture. Don't rely on anything starting with an
+    underscore.
+    """
+
+    def __init__(self):
+        self._groups: Dict[Type[ConstraintsGroup], Dict[enum.Enum, Any]] = {}
+        # Keys are nodeids. Values are dicts used as insertion-ordered sets of constraints.
+        self._by_nodeid: Dict[str, Dict[enum.Enum, None]] = {}
+        # The nodeids of the honoring items that were selected to run, or None if that isn't
+        # known yet, in which case every item counts as selected.
+        self._selected: Optional[FrozenSet[str]] = None
+        # Each nodeid's constraints as a frozenset, built once the index is frozen.
+        self._frozensets: Dict[str, FrozenSet[ConstraintsGroup]] = {}
+        self._frozen = False
+
+    # Building
+
+    def add(self, item, constraint: ConstraintsGroup):
+        """Record that the item honors the constraint. Adding the same pair twice is harmless."""
+
+        if self._frozen:
+            raise RuntimeError("Can't add to a frozen HonorsIndex")
+        constraints = self._by_nodeid.setdefault(item.nodeid, {})
+        if constraint in constraints:
+            return
+        constraints[constraint] = None
+        self._groups.setdefault(constraint.__class__, {}).setdefault(constraint, []).append(item)
+
+    def select(self, items: Iterable):
+        """Record which items were selected to run, after deselection by -k, -m, --sw, etc."""
+
+        if self._frozen:
+            raise RuntimeError("Can't select items in a frozen HonorsIndex")
+        self._selected = frozenset(
+            item.nodeid for item in items if item.nodeid in self._by_nodeid
+        )
+
+    def clear(self):
+        """Forget everything so the index can be built again, unless it's frozen."""
+
+        if self._frozen:
+            raise RuntimeError("Can't clear a frozen HonorsIndex")
+        self._groups.clear()
+        self._by_nodeid.clear()
+        self._selected = None
+
+    def freeze(self):
+        """Make the index immutable. Lookups no longer need to copy their results."""
+
+        if self._frozen:
+            return
+        for group_members in self._groups.values():
+            for constraint, items in group_members.items():
+                group_members[constraint] = tuple(items)
+        self._frozensets = {
+            nodeid: frozenset(constraints) for nodeid, constraints in self._by_nodeid.items()
+        }
+        self._frozen = True
+
+    @property
+    def frozen(self) -> bool:
+        """Return True if the index can no longer be changed."""
+
+        return self._frozen
+
+    def snapshot(self) -> "HonorsIndex":
+        """Return a frozen copy of the index as it is right now, or the index if it's frozen."""
+
+        if self._frozen:
+            return self
+        copy = HonorsIndex()
+        copy._groups = {
+            group: {constraint: tuple(items) for constraint, items in group_members.items()}
+            for group, group_members in self._groups.items()
+        }
+        copy._by_nodeid = {nodeid: dict(cons) for nodeid, cons in self._by_nodeid.items()}
+        copy._selected = self._selected
+        copy.freeze()
+        return copy
+
+    # Lookups
+
+    def constraints_for(self, item: Union[str, Any]) -> FrozenSet[ConstraintsGroup]:
+        """Return the constraints honored by the given item or nodeid."""
+
+        nodeid = item if isinstance(item, str) else item.nodeid
+        if self._frozen:
+            return self._frozensets.get(nodeid, frozenset())
+        return frozenset(self._by_nodeid.get(nodeid, ()))
+
+    def items_for(self, constraint: ConstraintsGroup) -> Sequence:
+        """Return the items that honor the given constraint."""
+
+        items = self._groups.get(constraint.__class__, {}).get(constraint, ())
+        return items if self._frozen else tuple(items)
+
+    def honors(self, item: Union[str, Any], constraint: ConstraintsGroup) -> bool:
+        """Return True if the given item or nodeid honors the constraint."""
+
+        nodeid = item if isinstance(item, str) else item.nodeid
+        return constraint in self._by_nodeid.get(nodeid, ())
+
+    def iter_group(
+        self, group: Type[ConstraintsGroup]
+    ) -> Iterator[Tuple[ConstraintsGroup, Sequence]]:
+        """Yield each honored constraint in the group along with the items that honor it."""
+
+        for constraint, items in self._groups.get(group, {}).items():
+            yield constraint, items if self._frozen else tuple(items)
+
+    @property
+    def nodeids(self) -> FrozenSet[str]:
+        """Return the nodeids of every item that honors at least one constraint."""
+
+        return frozenset(self._by_nodeid)
+
+    @property
+    def selected(self) -> FrozenSet[str]:
+        """Return the nodeids of the honoring items that were selected to run."""
+
+        if self._selected is None:
+            return self.nodeids
+        return self._selected
+
+    def is_selected(self, item: Union[str, Any]) -> bool:
+        """Return True if the given honoring item or nodeid was selected to run."""
+
+        nodeid = item if isinstance(item, str) else item.nodeid
+        if self._selected is None:
+            return nodeid in self._by_nodeid
+        return nodeid in self._selected
+
+    def to_matrix(self):
+        """Return which items honor which constraints as a sparse CoverageMatrix."""
+
+        from .matrix import CoverageMatrix
+
+        return CoverageMatrix.from_rows(
+            {
+                nodeid: {constraint_key(constraint) for constraint in constraints}
+                for nodeid, constraints in self._by_nodeid.items()
+            }
+        )
+
+    # Mapping protocol
+
+    def __getitem__(self, group: Type[ConstraintsGroup]) -> Mapping[ConstraintsGroup, Sequence]:
+        return MappingProxyType(self._groups[group])
+
+    def __iter__(self) -> Iterator[Type[ConstraintsGroup]]:
+        return iter(self._groups)
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def __repr__(self) -> str:
+        state = "frozen" if self._frozen else "building"
+        return (
+            f"<HonorsIndex {state}: {len(self._groups)} groups, "
+            f"{len(self._by_nodeid)} honoring items>"
+        )
+
+
+def constraint_key(constraint: ConstraintsGroup) -> str:
+    """Return the string name of a constraint, like 'ISO27001Controls.A_5_1'."""
+
+    return f"{constraint.__class__.__name__}.{constraint.name}"
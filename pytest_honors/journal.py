@@ -0,0 +1,194 @@
+"""Stream evidence to disk as tests report, and rebuild it from a partial run."""
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .constraints import ConstraintsGroup
+from .index import HonorsIndex, constraint_key
+
+# Bump this whenever the meaning of existing records changes.
+JOURNAL_VERSION = 1
+
+# Buffered records are written once there are this many of them...
+BATCH_SIZE = 100
+# ...or this many seconds after the first of them was queued, whichever comes first.
+FLUSH_SECONDS = 1.0
+
+# The result given to journaled honorers that never reported, like those still queued when a run
+# was killed.
+NOT_RUN = "not run"
+# The result journaled for honorers whose setup failed, so their call never ran.
+SETUP_ERROR = "error"
+
+
+class EvidenceJournal:
+    """An append-only JSON-lines file of honoring tests and their results.
+
+    Records are buffered in memory and written in batches, so a crash loses at most one batch.
+    A timer writes any partial batch after FLUSH_SECONDS, even if a test hangs and nothing else
+    is ever queued.
+
+    Each line is a complete JSON object with a "type" key:
+
+    - "session": written first, with the journal version and start time.
+    - "group": a constraint group's name and docstring, and its honored constraints' values.
+    - "test": an honoring test's nodeid, name, docstring, and the keys of its constraints.
+    - "result": a test's nodeid and the outcome of its call, or "error" if its setup failed.
+    - "finish": the session's exit status. This is missing if the process was killed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+        self._buffer: List[str] = []
+        # The timer runs on its own thread, so the buffer and file are only touched with this held.
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def write(self, record: Dict, flush: bool = False):
+        """Queue a record, writing the queue to disk if it's big enough or flush is True."""
+
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            if flush or len(self._buffer) >= BATCH_SIZE:
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(FLUSH_SECONDS, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write every queued record and hand them to the operating system."""
+
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """Flush and close the journal."""
+
+        with self._lock:
+            if not self._file.closed:
+                self._flush()
+                self._file.close()
+
+    def _flush(self):
+        """Write every queued record. The caller must hold the lock."""
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._file.closed:
+            return
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+        self._file.flush()
+
+    def start(self):
+        """Record the start of a session."""
+
+        self.write({"type": "session", "version": JOURNAL_VERSION, "started": time.time()})
+
+    def index(self, items: HonorsIndex):
+        """Record every constraint group, constraint, and honoring test in the index."""
+
+        tests: Dict[str, Tuple] = {}
+        for group, group_members in items.items():
+            self.write(
+                {
+                    "type": "group",
+                    "group": group.__name__,
+                    "doc": group.__doc__,
+                    "constraints": {
+                        constraint.name: constraint.value for constraint in group_members
+                    },
+                }
+            )
+            for constraint, honorers in group_members.items():
+                for test in honorers:
+                    keys = tests.setdefault(test.nodeid, (test, []))[1]
+                    keys.append(constraint_key(constraint))
+
+        for nodeid, (test, keys) in tests.items():
+            self.write(
+                {
+                    "type": "test",
+                    "nodeid": nodeid,
+                    "name": test.name,
+                    "doc": test.obj.__doc__,
+                    "constraints": keys,
+                }
+            )
+        self.flush()
+
+    def result(self, nodeid: str, outcome: str):
+        """Record the outcome of a honoring test."""
+
+        self.write({"type": "result", "nodeid": nodeid, "outcome": outcome})
+
+    def finish(self, exitstatus: int):
+        """Record the end of a session."""
+
+        self.write({"type": "finish", "exitstatus": int(exitstatus)}, flush=True)
+
+
+class JournaledTest(NamedTuple):
+    """Enough of a pytest item to report on a test read back from a journal."""
+
+    nodeid: str
+    name: str
+    obj: SimpleNamespace
+
+
+class Recovered(NamedTuple):
+    """Everything that could be read back from a journal."""
+
+    items: HonorsIndex
+    results: Dict[str, str]
+    # The session's exit status, or None if it never finished.
+    exitstatus: Optional[int]
+
+
+def recover(path: str) -> Recovered:
+    """Rebuild the index and results of a possibly unfinished session from its journal."""
+
+    constraints: Dict[str, ConstraintsGroup] = {}
+    items = HonorsIndex()
+    results: Dict[str, str] = {}
+    exitstatus = None
+
+    with open(path, encoding="utf-8") as infile:
+        for line in infile:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # The process died in the middle of writing this line, so it must be the last.
+                break
+            kind = record["type"]
+            if kind == "group":
+                # Recreate the group as a new ConstraintsGroup holding its honored members.
+                group = ConstraintsGroup(  # type: ignore
+                    record["group"], list(record["constraints"].items())
+                )
+                group.__doc__ = record["doc"]
+                for name in record["constraints"]:
+                    constraints[f"{record['group']}.{name}"] = group[name]  # type: ignore
+            elif kind == "test":
+                test = JournaledTest(
+                    record["nodeid"], record["name"], SimpleNamespace(__doc__=record["doc"])
+                )
+                for key in record["constraints"]:
+                    items.add(test, constraints[key])
+            elif kind == "result":
+                results[record["nodeid"]] = record["outcome"]
+            elif kind == "finish":
+                exitstatus = record["exitstatus"]
+
+    for nodeid in items.nodeids - results.keys():
+        results[nodeid] = NOT_RUN
+    items.freeze()
+    return Recovered(items, results, exitstatus)
@@ -0,0 +1,247 @@
+"""A sparse test by constraint coverage matrix, and analyses of redundancy and overlap."""
+
+import gzip
+import json
+from array import array
+from collections import Counter
+from itertools import combinations
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .index import constraint_key
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# The array typecode for row pointers and column indices: signed 64-bit on every platform.
+INDEX_TYPECODE = "q"
+
+
+class Overlap(NamedTuple):
+    """Two constraints that share honorers."""
+
+    first: str
+    second: str
+    shared: int
+    jaccard: float
+
+
+class Subsumed(NamedTuple):
+    """A test whose constraints are all honored by another test, too."""
+
+    test: str
+    by: str
+    # True if the other test honors exactly the same constraints.
+    duplicate: bool
+
+
+class CoverageMatrix:
+    """Which tests honor which constraints, as a sparse matrix in compressed sparse row form.
+
+    Row i is the test ``tests[i]``, and column j is the constraint ``constraints[j]``. The columns
+    of the constraints honored by row i are ``indices[indptr[i]:indptr[i + 1]]``, in ascending
+    order. ``indptr`` and ``indices`` are ``array.array`` objects, so they can be handed to NumPy
+    or SciPy without copying.
+    """
+
+    def __init__(
+        self, tests: Sequence[str], constraints: Sequence[str], indptr: array, indices: array
+    ):
+        self.tests = list(tests)
+        self.constraints = list(constraints)
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_rows(cls, rows: Dict[str, Set[str]]) -> "CoverageMatrix":
+        """Build a matrix from a dict of test nodeids to the keys of the constraints they honor."""
+
+        tests = sorted(rows)
+        constraints = sorted({key for keys in rows.values() for key in keys})
+        columns = {key: column for column, key in enumerate(constraints)}
+        indptr = array(INDEX_TYPECODE, [0])
+        indices = array(INDEX_TYPECODE)
+        for test in tests:
+            indices.extend(sorted(columns[key] for key in rows[test]))
+            indptr.append(len(indices))
+        return cls(tests, constraints, indptr, indices)
+
+    @classmethod
+    def from_items(cls, items) -> "CoverageMatrix":
+        """Build a matrix from an HonorsIndex, or anything else shaped like it."""
+
+        rows: Dict[str, Set[str]] = {}
+        for group_members in items.values():
+            for constraint, tests in group_members.items():
+                key = constraint_key(constraint)
+                for test in tests:
+                    rows.setdefault(test.nodeid, set()).add(key)
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_json_report(cls, path: str) -> "CoverageMatrix":
+        """Build a matrix from a report written by --honors-report-json."""
+
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as infile:  # type: ignore
+            report = json.load(infile)
+
+        rows: Dict[str, Set[str]] = {}
+        for group in report["groups"]:
+            for constraint in group["constraints"]:
+                for test in constraint["tests"]:
+                    rows.setdefault(test["nodeid"], set()).add(constraint["key"])
+        return cls.from_rows(rows)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Return the number of tests and constraints."""
+
+        return len(self.tests), len(self.constraints)
+
+    @property
+    def nnz(self) -> int:
+        """Return the number of test and constraint pairs."""
+
+        return len(self.indices)
+
+    def row(self, index: int) -> array:
+        """Return the columns of the constraints honored by the test in the given row."""
+
+        start, end = self.indptr[index], self.indptr[index + 1]
+        return self.indices[start:end]
+
+    def column_counts(self) -> List[int]:
+        """Return the number of tests honoring each constraint."""
+
+        if numpy is not None:
+            return numpy.bincount(self._numpy_indices(), minlength=len(self.constraints)).tolist()
+        counts = [0] * len(self.constraints)
+        for column in self.indices:
+            counts[column] += 1
+        return counts
+
+    def co_coverage(self) -> Dict[Tuple[int, int], int]:
+        """Return how many tests honor each pair of constraints, by their columns.
+
+        Keys are ``(i, j)`` with ``i <= j``, so ``(i, i)`` is the number of tests honoring i.
+        Pairs that no test honors together are left out.
+        """
+
+        if numpy is not None:
+            matrix = self._numpy_co_coverage()
+            first, second = numpy.nonzero(numpy.triu(matrix))
+            return {
+                (i, j): int(count)
+                for i, j, count in zip(first.tolist(), second.tolist(), matrix[first, second])
+            }
+
+        counts: Counter = Counter()
+        for index in range(len(self.tests)):
+            row = self.row(index)
+            counts.update((column, column) for column in row)
+            counts.update(combinations(row, 2))
+        return dict(counts)
+
+    def overlaps(self, min_jaccard: float = 0.0, top: Optional[int] = None) -> List[Overlap]:
+        """Return pairs of distinct constraints sharing honorers, most similar first.
+
+        Similarity is the Jaccard index of their sets of honorers: the number of tests honoring
+        both, divided by the number honoring either.
+        """
+
+        # Columns are sorted by key, so ties are broken by column, too.
+        if numpy is not None:
+            matrix = self._numpy_co_coverage()
+            totals = numpy.diag(matrix)
+            first, second = numpy.nonzero(numpy.triu(matrix, k=1))
+            shared = matrix[first, second]
+            jaccard = shared / (totals[first] + totals[second] - shared)
+            keep = numpy.nonzero(jaccard >= min_jaccard)[0]
+            order = keep[numpy.lexsort((second[keep], first[keep], -shared[keep], -jaccard[keep]))]
+            pairs = zip(
+                first[order[:top]].tolist(),
+                second[order[:top]].tolist(),
+                shared[order[:top]].tolist(),
+                jaccard[order[:top]].tolist(),
+            )
+        else:
+            counts = self.co_coverage()
+            pairs = sorted(
+                (
+                    (i, j, shared, shared / (counts[i, i] + counts[j, j] - shared))
+                    for (i, j), shared in counts.items()
+                    if i != j
+                ),
+                key=lambda pair: (-pair[3], -pair[2], pair[0], pair[1]),
+            )
+            pairs = [pair for pair in pairs if pair[3] >= min_jaccard][:top]
+
+        return [
+            Overlap(self.constraints[i], self.constraints[j], shared, value)
+            for i, j, shared, value in pairs
+        ]
+
+    def subsumed(self) -> List[Subsumed]:
+        """Return the tests whose constraints are all honored by some other single test.
+
+        Tests honoring exactly the same constraints are grouped first, and all but the first of
+        each group are duplicates of it. Then each distinct set of constraints is checked against
+        the others by intersecting, in C, the sets of rows honoring each of its constraints.
+        """
+
+        groups: Dict[Tuple[int, ...], List[int]] = {}
+        for index in range(len(self.tests)):
+            groups.setdefault(tuple(self.row(index)), []).append(index)
+        distinct = list(groups)
+
+        columns: List[Set[int]] = [set() for _ in self.constraints]
+        for position, row in enumerate(distinct):
+            for column in row:
+                columns[column].add(position)
+
+        subsumed = []
+        for position, row in enumerate(distinct):
+            members = groups[row]
+            first = self.tests[members[0]]
+            subsumed.extend(Subsumed(self.tests[index], first, True) for index in members[1:])
+            if not row:
+                continue
+
+            candidates = sorted((columns[column] for column in row), key=len)
+            supersets = set.intersection(*candidates)
+            supersets.discard(position)
+            if supersets:
+                # Prefer the smallest superset, since it's the closest match.
+                best = min(supersets, key=lambda other: (len(distinct[other]), other))
+                by = self.tests[groups[distinct[best]][0]]
+                subsumed.append(Subsumed(first, by, False))
+
+        return sorted(subsumed)
+
+    def _numpy_indices(self):
+        """Return the column indices as a NumPy array without copying."""
+
+        return numpy.frombuffer(self.indices, dtype=numpy.int64)
+
+    def _numpy_co_coverage(self):
+        """Return the constraint by constraint co-coverage matrix, computed with NumPy.
+
+        Rows with the same number of constraints are stacked into a 2D block, so every pair in
+        every row of that length is counted with one bincount.
+        """
+
+        size = len(self.constraints)
+        indptr = numpy.frombuffer(self.indptr, dtype=numpy.int64)
+        indices = self._numpy_indices()
+        lengths = numpy.diff(indptr)
+        counts = numpy.zeros(size * size, dtype=numpy.int64)
+        for length in numpy.unique(lengths).tolist():
+            if length == 0:
+                continue
+            starts = indptr[:-1][lengths == length]
+            block = indices[starts[:, None] + numpy.arange(length)]
+            pairs = block[:, :, None] * size + block[:, None, :]
+            counts += numpy.bincount(pairs.ravel(), minlength=size * size)
+        return counts.reshape(size, size)
@@ -0,0 +1,240 @@
+"""Assign constraints to tests by matching their nodeids against configured patterns."""
+
+import importlib
+import re
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+from .constraints import ConstraintsGroup
+
+# Patterns starting with this are regular expressions. Everything else is a glob.
+REGEX_PREFIX = "re:"
+
+# Regex metacharacters that end a pattern's literal prefix...
+REGEX_SPECIAL = set(".^$*+?{}[]\\|()")
+# ...and ones that make the character before them optional.
+REGEX_QUANTIFIERS = set("*+?{")
+
+# Inline flags at the start of a regex, like "(?i)", which apply to the whole regex.
+REGEX_GLOBAL_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+
+
+class PatternRule(NamedTuple):
+    """One configured line: a nodeid pattern and the constraints it assigns."""
+
+    pattern: str
+    regex: str
+    prefix: str
+    references: Tuple[str, ...]
+
+
+class PatternMatcher:
+    """Match nodeids against many patterns at once.
+
+    Each configuration line looks like ``PATTERN = Group.member, other.module:Group.member``.
+    PATTERN is a glob matched against the whole nodeid, where ``**`` matches anything, ``*``
+    matches anything but a slash, and ``?`` matches one character but a slash. Patterns starting
+    with ``re:`` are regular expressions matched from the start of the nodeid instead. Regular
+    expressions can't use numbered backreferences, since they're compiled together. Inline flags
+    like ``(?i)`` must come first, and only apply to their own expression. Expressions can reuse
+    group names, but then they can't be combined, so each of them is tried on every nodeid.
+
+    The rules are compiled once. Rules that start with literal text, like most globs, are stored
+    in a trie of those prefixes so a nodeid is only tested against the rules whose prefix it
+    starts with. The rest are combined into one alternation regex that rejects most nodeids in a
+    single match.
+    """
+
+    def __init__(self, lines: List[str]):
+        self.rules = [parse_line(line) for line in lines if line.strip()]
+        self._trie: Dict = {}
+        unprefixed = []
+        for index, rule in enumerate(self.rules):
+            if rule.prefix:
+                node = self._trie
+                for char in rule.prefix:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, []).append(index)
+            else:
+                unprefixed.append(index)
+        self._compiled = [re.compile(rule.regex) for rule in self.rules]
+        self._unprefixed = unprefixed
+        try:
+            self._any_unprefixed: Optional[Pattern] = re.compile(
+                "|".join(f"(?:{self.rules[index].regex})" for index in unprefixed)
+            )
+        except re.error:
+            # Two of them define the same group name, so try each of them instead.
+            self._any_unprefixed = None
+        self._resolved: Dict[str, ConstraintsGroup] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def candidates(self, nodeid: str) -> List[int]:
+        """Return the indexes of the rules that could match the nodeid."""
+
+        found = []
+        node = self._trie
+        for char in nodeid:
+            node = node.get(char)
+            if node is None:
+                break
+            found.extend(node.get(None, ()))
+        if self._unprefixed and (
+            self._any_unprefixed is None or self._any_unprefixed.match(nodeid)
+        ):
+            found.extend(self._unprefixed)
+        return found
+
+    def match(self, nodeid: str) -> List[ConstraintsGroup]:
+        """Return the constraints assigned to the nodeid by every rule that matches it."""
+
+        constraints = []
+        for index in sorted(self.candidates(nodeid)):
+            if self._compiled[index].match(nodeid):
+                constraints.extend(self.resolve(ref) for ref in self.rules[index].references)
+        return constraints
+
+    def resolve(self, reference: str) -> ConstraintsGroup:
+        """Return the constraint named by a reference, remembering it for next time.
+
+        References are resolved the first time they match, rather than when the configuration is
+        read, so that they can name groups defined in conftest.py or test modules.
+        """
+
+        constraint = self._resolved.get(reference)
+        if constraint is None:
+            constraint = self._resolved[reference] = resolve_reference(reference)
+        return constraint
+
+
+def parse_line(line: str) -> PatternRule:
+    """Parse a ``PATTERN = Constraint, Constraint`` line into a rule."""
+
+    pattern, separator, references = line.rpartition("=")
+    pattern = pattern.strip()
+    refs = tuple(ref.strip() for ref in references.split(",") if ref.strip())
+    if not separator or not pattern or not refs:
+        raise ValueError(
+            f"honors_patterns lines must look like 'PATTERN = Constraint', not {line!r}"
+        )
+
+    if pattern.startswith(REGEX_PREFIX):
+        start = len(REGEX_PREFIX)
+        regex = scope_flags(pattern[start:])
+        try:
+            re.compile(regex)
+        except re.error as exc:
+            raise ValueError(
+                f"honors_patterns has a bad regular expression in {line!r}: {exc}"
+            ) from None
+        return PatternRule(pattern, regex, regex_prefix(regex), refs)
+    return PatternRule(pattern, glob_to_regex(pattern), glob_prefix(pattern), refs)
+
+
+def scope_flags(regex: str) -> str:
+    """Turn a regex's leading inline flags, like ``(?i)x``, into a group like ``(?i:x)``.
+
+    Global flags are only allowed at the very start of a regex, so the scoped form is what can be
+    joined with others.
+    """
+
+    flags = ""
+    match = REGEX_GLOBAL_FLAGS.match(regex)
+    while match:
+        flags += match.group(1)
+        start = match.end()
+        regex = regex[start:]
+        match = REGEX_GLOBAL_FLAGS.match(regex)
+    if not flags:
+        return regex
+    # A verbose regex could end in a comment, which would swallow the closing parenthesis.
+    end = "\n)" if "x" in flags else ")"
+    return f"(?{flags}:{regex}{end}"
+
+
+def glob_to_regex(glob: str) -> str:
+    """Translate a nodeid glob into a regular expression matching the whole nodeid."""
+
+    parts = []
+    index = 0
+    while index < len(glob):
+        if glob.startswith("**", index):
+            parts.append(".*")
+            index += 2
+        elif glob[index] == "*":
+            parts.append("[^/]*")
+            index += 1
+        elif glob[index] == "?":
+            parts.append("[^/]")
+            index += 1
+        else:
+            parts.append(re.escape(glob[index]))
+            index += 1
+    return "".join(parts) + r"\Z"
+
+
+def glob_prefix(glob: str) -> str:
+    """Return the literal text at the start of a glob."""
+
+    return re.split(r"[*?]", glob, 1)[0]
+
+
+def regex_prefix(regex: str) -> str:
+    """Return literal text that every match of the regex must start with, which may be empty."""
+
+    if "|" in regex:
+        # An alternation could let a match start with anything, and telling top-level ones from
+        # ones inside a group isn't worth it.
+        return ""
+    prefix = []
+    for char in regex:
+        if char in REGEX_SPECIAL:
+            if char in REGEX_QUANTIFIERS and prefix:
+                # The previous character is optional or repeated, so it's not part of the prefix.
+                prefix.pop()
+            break
+        prefix.append(char)
+    return "".join(prefix)
+
+
+def resolve_reference(reference: str) -> ConstraintsGroup:
+    """Return the constraint named like ``Group.member`` or ``package.module:Group.member``."""
+
+    module_name, _, name = reference.rpartition(":")
+    group_name, _, member = name.rpartition(".")
+    if not group_name:
+        raise ValueError(f"Constraint {reference!r} must look like 'Group.member'")
+
+    if module_name:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as exc:
+            raise ValueError(f"Can't import {module_name!r} for {reference!r}: {exc}") from None
+        group = getattr(module, group_name, None)
+        groups = [group] if isinstance(group, type) and issubclass(group, ConstraintsGroup) else []
+    else:
+        groups = [group for group in all_groups() if group.__name__ == group_name]
+
+    if not groups:
+        raise ValueError(f"No ConstraintsGroup named {group_name!r} for {reference!r}")
+    if len(groups) > 1:
+        raise ValueError(
+            f"More than one ConstraintsGroup is named {group_name!r}; "
+            f"use 'module:{name}' to say which one {reference!r} means"
+        )
+    try:
+        return groups[0][member]
+    except KeyError:
+        raise ValueError(f"{group_name} has no constraint named {member!r}") from None
+
+
+def all_groups(base: Optional[type] = None) -> List[type]:
+    """Return every subclass of ConstraintsGroup that's been defined so far."""
+
+    base = base or ConstraintsGroup
+    groups = []
+    for subclass in base.__subclasses__():
+        groups.append(subclass)
+        groups.extend(all_groups(subclass))
+    return groups
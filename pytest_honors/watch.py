@@ -0,0 +1,282 @@
+"""Keep the honors index warm and re-report whenever test files change."""
+
+import contextlib
+import fnmatch
+import importlib
+import io
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pytest
+
+from . import (
+    CACHE_KEY_COUNTS,
+    MARKER_HELP,
+    OPT_PATTERNS,
+    PATTERNS_HELP,
+    fail_on_regressions,
+    fixtures,
+    item_constraints,
+    load_patterns,
+    make_counts,
+    render_as_markdown,
+)
+from .index import HonorsIndex
+from .patterns import PatternMatcher
+
+# Watched tests are collected but never run, so this is the result shown for each of them.
+NOT_RUN = "not run"
+
+# pytest's default `python_files` patterns. Changes to other Python files are ignored.
+TEST_FILE_PATTERNS = ("test_*.py", "*_test.py")
+
+# Directories that are never worth scanning for test files.
+SKIPPED_DIRS = {"__pycache__", "node_modules", "venv", "build", "dist"}
+
+
+class _Collector:
+    """A pytest plugin that records the constraints honored by collected items."""
+
+    def __init__(self):
+        self.files: Dict[str, Dict[str, Tuple]] = {}
+        self.old_counts: Dict[str, int] = {}
+        self.patterns = PatternMatcher([])
+
+    def pytest_addoption(self, parser):
+        """Read the same constraint patterns as the plugin."""
+
+        parser.addini(OPT_PATTERNS, PATTERNS_HELP, type="linelist")
+
+    def pytest_configure(self, config):
+        """Define the "honors" mark and load the stored counts to compare against."""
+
+        config.addinivalue_line("markers", MARKER_HELP)
+        self.patterns = load_patterns(config)
+        fixtures.clear()
+        if getattr(config, "cache", None) is not None:
+            self.old_counts = config.cache.get(CACHE_KEY_COUNTS, {})
+
+    def pytest_itemcollected(self, item):
+        """Remember each item's constraints, grouped by the file it came from."""
+
+        tests = self.files.setdefault(str(item.path), {})
+        constraints = tuple(item_constraints(item, self.patterns))
+        if constraints:
+            tests[item.nodeid] = (item, constraints)
+
+
+class Watcher:
+    """Hold the constraint to test index in memory and refresh it as files change."""
+
+    def __init__(
+        self,
+        args: Iterable[str],
+        report: Optional[str] = None,
+        interval: float = 0.5,
+        out=sys.stdout,
+    ):
+        self.args = list(args) or ["."]
+        self.report = report
+        self.interval = interval
+        self.out = out
+        # Each key is an absolute file path, and each value maps the nodeids of the honoring tests
+        # in that file to the test item and the constraints it honors.
+        self.files: Dict[str, Dict[str, Tuple]] = {}
+        self.mtimes: Dict[str, float] = {}
+        self.old_counts: Dict[str, int] = {}
+
+    def run(self):
+        """Collect everything once, then re-collect and re-report changed files until stopped."""
+
+        self.mtimes = self.scan()
+        self.refresh(self.args)
+        self.emit()
+        try:
+            while True:
+                time.sleep(self.interval)
+                if self.poll():
+                    self.emit()
+        except KeyboardInterrupt:
+            pass
+
+    def poll(self) -> bool:
+        """Re-collect whatever changed since the last poll, returning True if anything did."""
+
+        mtimes = self.scan()
+        changed = [path for path, mtime in mtimes.items() if self.mtimes.get(path) != mtime]
+        removed = [path for path in self.mtimes if path not in mtimes]
+        self.mtimes = mtimes
+        if not changed and not removed:
+            return False
+
+        for path in removed:
+            self.files.pop(path, None)
+
+        if any(os.path.basename(path) == "conftest.py" for path in changed + removed):
+            # A conftest can change how anything is collected, so start over.
+            self.refresh(self.args, everything=True)
+        else:
+            tests = [path for path in changed if path in self.files or is_test_file(path)]
+            if tests:
+                self.refresh(tests)
+        return True
+
+    def scan(self) -> Dict[str, float]:
+        """Return the modification time of every Python file under the watched paths."""
+
+        mtimes = {}
+        for arg in self.args:
+            arg = os.path.abspath(arg.split("::")[0])
+            if os.path.isfile(arg):
+                mtimes[arg] = os.stat(arg).st_mtime
+                continue
+            for dirpath, dirnames, filenames in os.walk(arg):
+                dirnames[:] = [
+                    name
+                    for name in dirnames
+                    if not name.startswith(".") and name not in SKIPPED_DIRS
+                ]
+                for filename in filenames:
+                    if filename.endswith(".py"):
+                        path = os.path.join(dirpath, filename)
+                        with contextlib.suppress(OSError):
+                            mtimes[path] = os.stat(path).st_mtime
+        return mtimes
+
+    def refresh(self, paths: List[str], everything: bool = False):
+        """Collect only the given paths and replace their entries in the index.
+
+        If everything is True, the paths are all of the watched paths, and a successful collection
+        replaces the whole index instead.
+        """
+
+        forget_modules(paths)
+        collector = _Collector()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            exitcode = pytest.main(
+                ["--collect-only", "-qq", "-p", "no:honors", *paths], plugins=[collector]
+            )
+        if exitcode not in {pytest.ExitCode.OK, pytest.ExitCode.NO_TESTS_COLLECTED}:
+            # Keep the last good index for those files so that a typo doesn't look like a
+            # regression, but say why nothing changed.
+            self.out.write(output.getvalue())
+            self.out.write(f"honors: collection failed with {exitcode!r}, keeping last index\n")
+            return
+
+        if everything:
+            self.files.clear()
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isfile(path):
+                self.files.pop(path, None)
+        self.files.update(collector.files)
+        self.rebind_groups(collector.files)
+        self.old_counts = collector.old_counts
+
+    def rebind_groups(self, fresh: Dict[str, Dict[str, Tuple]]):
+        """Make every stored constraint a member of the same class as the freshly collected ones.
+
+        pytest imports conftest.py again for every collection, so a group defined there is a new
+        class each time. Without this, tests in files that weren't collected again would still
+        honor the old class's constraints, and the index would have two groups with one name.
+        """
+
+        groups = {}
+        for tests in fresh.values():
+            for _, constraints in tests.values():
+                for constraint in constraints:
+                    group = constraint.__class__
+                    groups[group.__module__, group.__qualname__] = group
+
+        for tests in self.files.values():
+            for nodeid, (item, constraints) in tests.items():
+                tests[nodeid] = (
+                    item,
+                    tuple(
+                        groups.get(
+                            (constraint.__class__.__module__, constraint.__class__.__qualname__),
+                            constraint.__class__,
+                        )[constraint.name]
+                        for constraint in constraints
+                    ),
+                )
+
+    def items(self) -> HonorsIndex:
+        """Return a frozen HonorsIndex of everything collected so far."""
+
+        index = HonorsIndex()
+        for tests in self.files.values():
+            for item, constraints in tests.values():
+                for constraint in constraints:
+                    index.add(item, constraint)
+        index.freeze()
+        return index
+
+    def emit(self):
+        """Write the report, if requested, and a one-line summary of the current state."""
+
+        items = self.items()
+        if self.report:
+            results = {
+                item.nodeid: NOT_RUN
+                for group_members in items.values()
+                for tests in group_members.values()
+                for item in tests
+            }
+            with open(self.report, "w") as outfile:
+                for line in render_as_markdown(items, results):
+                    outfile.write(line + "\n")
+
+        new_counts = make_counts(items)
+        gaps = sum(len(group) - len(group_members) for group, group_members in items.items())
+        try:
+            fail_on_regressions(self.old_counts, new_counts)
+        except ValueError as exc:
+            regressions = "; ".join(exc.args[0])
+        else:
+            regressions = "none"
+
+        honorers = sum(len(tests) for tests in self.files.values())
+        self.out.write(
+            f"honors: {len(new_counts)} constraints honored by {honorers} tests, "
+            f"{gaps} unhonored constraints in {len(items)} groups, regressions: {regressions}\n"
+        )
+        self.out.flush()
+
+
+def is_test_file(path: str) -> bool:
+    """Return True if the path looks like a module that pytest would collect tests from."""
+
+    filename = os.path.basename(path)
+    return any(fnmatch.fnmatch(filename, pattern) for pattern in TEST_FILE_PATTERNS)
+
+
+def forget_modules(paths: Iterable[str]):
+    """Drop modules loaded from the given files or directories so they'll be imported fresh."""
+
+    files: Set[str] = set()
+    dirs: Set[str] = set()
+    for path in paths:
+        path = os.path.abspath(path.split("::")[0])
+        if os.path.isdir(path):
+            dirs.add(path + os.sep)
+        else:
+            files.add(path)
+
+    for name, module in list(sys.modules.items()):
+        filename = getattr(module, "__file__", None)
+        if not filename:
+            continue
+        filename = os.path.abspath(filename)
+        if filename in files:
+            del sys.modules[name]
+        elif any(filename.startswith(path) for path in dirs) and (
+            is_test_file(filename) or os.path.basename(filename) == "conftest.py"
+        ):
+            # Only test modules and conftests are re-imported. Reloading anything else, like the
+            # code under test or pytest_honors itself, would leave two copies of its classes.
+            del sys.modules[name]
+    importlib.invalidate_caches()
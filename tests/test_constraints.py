@@ -0,0 +1,61 @@
+"""Test the pytest_honors.constraints package."""
+
+import pytest
+
+from pytest_honors.constraints import ConstraintsGroup, Crosswalk
+
+
+class OldControls(ConstraintsGroup):
+    """The old numbering."""
+
+    one = "One"
+    two = "Two"
+
+
+class NewControls(ConstraintsGroup):
+    """The new numbering."""
+
+    uno = "One"
+    dos = "Two"
+
+
+class OtherControls(ConstraintsGroup):
+    """Another framework entirely."""
+
+    spam = "Spam"
+
+
+def test_crosswalk_resolve():
+    """Mappings resolve to every reachable constraint, following chains and cycles."""
+
+    crosswalk = Crosswalk()
+    crosswalk.update({OldControls.one: NewControls.uno, OldControls.two: [NewControls.dos]})
+    crosswalk.map(NewControls.uno, OtherControls.spam)
+    crosswalk.map(OtherControls.spam, OldControls.one)
+
+    assert crosswalk.resolve(OldControls.one) == {NewControls.uno, OtherControls.spam}
+    assert crosswalk.resolve(OldControls.two) == {NewControls.dos}
+    assert crosswalk.resolve(NewControls.dos) == frozenset()
+    assert crosswalk.resolve(OtherControls.spam) == {OldControls.one, NewControls.uno}
+
+
+def test_crosswalk_recompiles():
+    """Adding a mapping after compiling makes the next lookup recompile."""
+
+    crosswalk = Crosswalk()
+    crosswalk.map(OldControls.one, NewControls.uno)
+    assert crosswalk.resolve(OldControls.one) == {NewControls.uno}
+    crosswalk.map(OldControls.one, OtherControls.spam)
+    assert crosswalk.resolve(OldControls.one) == {NewControls.uno, OtherControls.spam}
+    crosswalk.clear()
+    assert not crosswalk
+    assert crosswalk.resolve(OldControls.one) == frozenset()
+
+
+def test_crosswalk_type_errors():
+    """Only constraints can be crosswalked, and groups only map their own members."""
+
+    with pytest.raises(TypeError):
+        Crosswalk().map(OldControls.one, "uno")
+    with pytest.raises(TypeError):
+        OldControls.crosswalk({NewControls.uno: OldControls.one})
@@ -0,0 +1,70 @@
+"""Test the pytest_honors.emit module."""
+
+import gzip
+
+import pytest
+
+from pytest_honors.emit import ReportEmitter, open_report
+
+
+def render(items, results):
+    """Yield a tiny report."""
+
+    yield f"{items}\n"
+    yield f"{results}\n"
+
+
+def explode(items, results):
+    """Fail halfway through a report."""
+
+    yield "partial\n"
+    raise RuntimeError("boom")
+
+
+def test_emitter_commits(tmp_path):
+    """Finished reports are moved into place, leaving no temporary files behind."""
+
+    emitter = ReportEmitter([(str(tmp_path / "a.md"), render), (str(tmp_path / "b.gz"), render)])
+    emitter.start("items", "results")
+    emitter.start("ignored", "ignored")
+    emitter.finish()
+
+    assert (tmp_path / "a.md").read_text() == "items\nresults\n"
+    with gzip.open(tmp_path / "b.gz", "rt") as infile:
+        assert infile.read() == "items\nresults\n"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.md", "b.gz"]
+
+
+def test_emitter_discards(tmp_path):
+    """Reports aren't moved into place when the session didn't succeed."""
+
+    emitter = ReportEmitter([(str(tmp_path / "a.md"), render)])
+    emitter.start("items", "results")
+    emitter.finish(commit=False)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_emitter_raises(tmp_path):
+    """A failing report raises its error, and no reports are moved into place."""
+
+    (tmp_path / "b.md").write_text("old")
+    emitter = ReportEmitter([(str(tmp_path / "a.md"), render), (str(tmp_path / "b.md"), explode)])
+    emitter.start("items", "results")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        emitter.finish()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["b.md"]
+    assert (tmp_path / "b.md").read_text() == "old"
+
+
+def test_open_report_gzip(tmp_path):
+    """Reports whose names end in .gz are compressed."""
+
+    path = str(tmp_path / "report.json.gz")
+    with open_report(path) as outfile:
+        outfile.write("{}")
+
+    with gzip.open(path, "rt") as infile:
+        assert infile.read() == "{}"
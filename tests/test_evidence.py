@@ -0,0 +1,71 @@
+"""Test the pytest_honors.evidence module."""
+
+import sys
+import time
+from unittest import mock
+
+import pytest
+
+from pytest_honors import evidence
+
+
+def fixture_func():
+    """Stands in for a fixture."""
+
+
+@pytest.fixture
+def item():
+    """Return a stand-in for a test item."""
+
+    fixturedef = mock.Mock(func=fixture_func)
+    return mock.Mock(
+        nodeid="tests/test_evidence.py::test_thing",
+        obj=fixture_func,
+        module=sys.modules[__name__],
+        fixturenames=["spam"],
+        _fixtureinfo=mock.Mock(name2fixturedefs={"spam": [fixturedef]}),
+    )
+
+
+def test_fingerprint(item):
+    """Fingerprints are stable, and change with the extra key."""
+
+    first = evidence.fingerprint(item, "lock1")
+    assert first == evidence.fingerprint(item, "lock1")
+    assert first != evidence.fingerprint(item, "lock2")
+
+
+def test_fingerprint_without_source(item):
+    """Tests whose source can't be found can't be cached."""
+
+    item.obj = len
+    assert evidence.fingerprint(item) is None
+
+
+@pytest.mark.parametrize(
+    "entry,reused",
+    [
+        (None, False),
+        ({"fingerprint": "other", "outcome": "passed", "time": 0}, False),
+        ({"fingerprint": "abc", "outcome": "failed", "time": 0}, False),
+        ({"fingerprint": "abc", "outcome": "passed", "time": -1000}, False),
+        ({"fingerprint": "abc", "outcome": "passed", "time": 0}, True),
+    ],
+)
+def test_cached_result(entry, reused):
+    """Only fresh, matching, passing entries are reused, and their times are returned."""
+
+    if entry:
+        entry = dict(entry, time=time.time() + entry["time"])
+    result = evidence.cached_result(entry, "abc", max_age=100)
+    if reused:
+        assert result == entry["time"]
+    else:
+        assert result is None
+
+
+def test_cached_labels():
+    """Cached results are labeled with when they were recorded, in UTC."""
+
+    assert evidence.cached_label(0) == "cached from 1970-01-01 00:00 UTC"
+    assert evidence.iso_time(0) == "1970-01-01T00:00:00+00:00"
@@ -1,7 +1,8 @@
 """Examples of tests written with honors marks."""
 
-from pytest import mark
+from pytest import fixture, mark
 
+from pytest_honors import honors
 from pytest_honors.constraints import ConstraintsGroup
 from pytest_honors.constraints.iso27001 import ISO27001Controls
 
@@ -24,3 +25,29 @@ def test_passes():
 def test_fails():
     """This test always fails."""
     assert False
+
+
+@fixture
+@honors(MyConstraints.walk)
+def walker():
+    """A fixture that honors a constraint for whoever uses it."""
+
+    return "funnily"
+
+
+def test_uses_fixture(walker):
+    """This test honors whatever its fixtures honor."""
+
+    assert walker == "funnily"
+
+
+def test_honors_index(honors_index):
+    """The session's HonorsIndex is available as a fixture."""
+
+    assert honors_index.frozen
+    assert MyConstraints.spam in honors_index.constraints_for(
+        "tests/test_examples.py::test_passes"
+    )
+    assert honors_index.constraints_for("tests/test_examples.py::test_uses_fixture") == {
+        MyConstraints.walk
+    }
@@ -0,0 +1,82 @@
+"""Test the pytest_honors.fixtures module."""
+
+from unittest import mock
+
+import pytest
+
+from pytest_honors import fixtures, honors
+from pytest_honors.constraints import ConstraintsGroup
+
+
+class SomeControls(ConstraintsGroup):
+    """Some things are here."""
+
+    spam = "Spam"
+    eggs = "Eggs"
+
+
+@honors(SomeControls.spam)
+def parent():
+    """The original fixture."""
+
+
+@honors(SomeControls.eggs)
+def child(parent):
+    """A fixture overriding the original and requesting it."""
+
+
+def make_item(fixturedefs):
+    """Return a stand-in test item using a fixture with the given definitions."""
+
+    return mock.Mock(
+        fixturenames=["spam", "request"],
+        _fixtureinfo=mock.Mock(name2fixturedefs={"spam": fixturedefs}),
+    )
+
+
+def test_honors_rejects_non_constraints():
+    """Only constraints can be honored."""
+
+    with pytest.raises(TypeError):
+        honors("spam")
+
+
+def test_honors_above_fixture():
+    """The decorator also works above @pytest.fixture."""
+
+    @honors(SomeControls.spam)
+    @pytest.fixture
+    def above():
+        """A fixture."""
+
+    assert above.__wrapped__.__honors__ == (SomeControls.spam,)
+
+
+def test_fixture_constraints_overrides():
+    """Overridden fixtures' constraints count only when the override requests them."""
+
+    parent_def = mock.Mock(func=parent, argnames=(), scope="function")
+    requesting = mock.Mock(func=child, argnames=("spam",), scope="function")
+    replacing = mock.Mock(func=child, argnames=(), scope="function")
+
+    with mock.patch.dict(fixtures._MEMO, clear=True):
+        assert list(fixtures.fixture_constraints(make_item([parent_def, requesting]))) == [
+            SomeControls.eggs,
+            SomeControls.spam,
+        ]
+        assert list(fixtures.fixture_constraints(make_item([parent_def, replacing]))) == [
+            SomeControls.eggs,
+        ]
+
+
+def test_fixturedef_constraints_memoized():
+    """Each fixture definition's constraints are only computed once per scope."""
+
+    fixturedef = mock.Mock(func=parent, scope="session")
+
+    with mock.patch.dict(fixtures._MEMO, clear=True):
+        assert fixtures.fixturedef_constraints(fixturedef) == (SomeControls.spam,)
+        fixturedef.func = child
+        assert fixtures.fixturedef_constraints(fixturedef) == (SomeControls.spam,)
+        fixturedef.scope = "module"
+        assert fixtures.fixturedef_constraints(fixturedef) == (SomeControls.eggs,)
@@ -1,12 +1,16 @@
 """Test the pytest_honors package."""
 
+import json
 from typing import NamedTuple
 from unittest import mock
 
 import pytest
 
 import pytest_honors
-from pytest_honors.constraints import ConstraintsGroup
+from pytest_honors.constraints import ConstraintsGroup, Crosswalk
+from pytest_honors.index import HonorsIndex
+
+pytest_plugins = ["pytester"]
 
 
 class SomeControls(ConstraintsGroup):
@@ -154,3 +158,444 @@ Supporting evidence:
   Path: ::func1
   Result: passed"""
     )
+
+
+class MockItem(NamedTuple):
+    nodeid: str
+
+
+def config_items(**values):
+    """Return a stand-in for get_config_item that returns the given values."""
+
+    return lambda session, name: values.get(name)
+
+
+def make_index(honorers):
+    """Return an HonorsIndex built from a dict of items to their constraints."""
+
+    index = HonorsIndex()
+    for item, constraints in honorers.items():
+        for constraint in constraints:
+            index.add(item, constraint)
+    return index
+
+
+def lf_config(lf=False, lastfailed=None):
+    """Return a stand-in config, with an LFPlugin that remembers lastfailed if it's given."""
+
+    config = mock.Mock()
+    config.getoption.side_effect = {"lf": lf}.get
+    if lastfailed is None:
+        config.pluginmanager.get_plugin.return_value = None
+    else:
+        config.pluginmanager.get_plugin.return_value = mock.Mock(
+            lastfailed=dict.fromkeys(lastfailed, True)
+        )
+    return config
+
+
+@pytest.mark.parametrize(
+    "lf,lastfailed,expected",
+    [
+        # Without the cacheprovider plugin, nothing was narrowed.
+        (True, None, None),
+        # --ff runs the tests that passed last time, too.
+        (False, ["one"], None),
+        # --lf runs everything if none of the collected tests failed last time.
+        (True, ["gone"], None),
+        (True, ["one", "gone"], {"one", "gone"}),
+    ],
+)
+def test_last_failed(lf, lastfailed, expected):
+    """--lf only narrows the session when some of the collected tests failed last time."""
+
+    config = lf_config(lf, lastfailed)
+    items = [MockItem("one"), MockItem("two")]
+
+    last_failed = pytest_honors.last_failed(config, items)
+
+    assert last_failed == expected
+    if lastfailed is not None:
+        # It's a copy, so LFPlugin forgetting tests that pass now doesn't change it.
+        config.pluginmanager.get_plugin.return_value.lastfailed.clear()
+        assert last_failed == expected
+
+
+@pytest.mark.parametrize(
+    "order,expected",
+    [
+        ("none", ["plain1", "one", "plain2", "both"]),
+        ("first", ["one", "both", "plain1", "plain2"]),
+        ("weighted", ["both", "one", "plain1", "plain2"]),
+    ],
+)
+def test_collection_modifyitems_order(order, expected):
+    """Honoring tests are moved to the front as requested."""
+
+    one, both = MockItem("one"), MockItem("both")
+    index = make_index({one: [SomeControls.spam], both: [SomeControls.spam, SomeControls.eggs]})
+    items = [MockItem("plain1"), one, MockItem("plain2"), both]
+
+    with mock.patch.object(pytest_honors, "_ITEMS", index), mock.patch.object(
+        pytest_honors, "get_config_item", config_items(honors_order=order)
+    ), mock.patch.object(pytest_honors, "_LAST_FAILED", None):
+        pytest_honors.pytest_collection_modifyitems(None, lf_config(), items)
+
+    assert [item.nodeid for item in items] == expected
+
+
+def test_collection_modifyitems_bad_order():
+    """Unknown orders are reported as usage errors."""
+
+    with mock.patch.object(
+        pytest_honors, "get_config_item", config_items(honors_order="sideways")
+    ), mock.patch.object(pytest_honors, "_LAST_FAILED", None):
+        with pytest.raises(pytest.UsageError):
+            pytest_honors.pytest_collection_modifyitems(None, lf_config(), [])
+
+
+def fail(session, nodeid, when):
+    """Send a failed report for the given phase of a test through the makereport wrapper."""
+
+    hook = pytest_honors.pytest_runtest_makereport(mock.Mock(nodeid=nodeid, session=session))
+    next(hook)
+    with pytest.raises(StopIteration):
+        hook.send(mock.Mock(get_result=lambda: mock.Mock(failed=True, when=when)))
+
+
+def test_maxfail_constraint():
+    """The session stops once every selected honorer of a constraint has failed."""
+
+    one, two = MockItem("one"), MockItem("two")
+    index = make_index({one: [SomeControls.spam, SomeControls.eggs], two: [SomeControls.spam]})
+    session = mock.Mock(items=[one, two], shouldfail=False)
+
+    with mock.patch.object(pytest_honors, "_ITEMS", index), mock.patch.dict(
+        pytest_honors._SURVIVORS, clear=True
+    ), mock.patch.object(pytest_honors, "get_config_item", return_value=True):
+        pytest_honors.pytest_collection_finish(session)
+        assert pytest_honors._SURVIVORS == {
+            SomeControls.spam: {"one", "two"},
+            SomeControls.eggs: {"one"},
+        }
+        fail(session, "one", "call")
+
+    assert session.shouldfail == (
+        "every honorer of SomeControls.eggs failed (--honors-maxfail-constraint)"
+    )
+
+
+def test_maxfail_constraint_ignores_teardown():
+    """An honorer whose call passed is still evidence when its teardown fails."""
+
+    one = MockItem("one")
+    index = make_index({one: [SomeControls.eggs]})
+    session = mock.Mock(items=[one], shouldfail=False)
+
+    with mock.patch.object(pytest_honors, "_ITEMS", index), mock.patch.dict(
+        pytest_honors._SURVIVORS, clear=True
+    ), mock.patch.object(pytest_honors, "get_config_item", return_value=True):
+        pytest_honors.pytest_collection_finish(session)
+        fail(session, "one", "teardown")
+        assert pytest_honors._SURVIVORS == {SomeControls.eggs: {"one"}}
+
+    assert session.shouldfail is False
+
+
+def test_item_constraints_crosswalk():
+    """Constraints reached through a crosswalk are honored, too."""
+
+    item = mock.Mock(own_markers=[pytest.mark.honors(SomeControls.spam).mark], fixturenames=[])
+
+    with mock.patch.object(pytest_honors, "CROSSWALKS", Crosswalk()) as crosswalk:
+        crosswalk.map(SomeControls.spam, OtherControls.favorite_color)
+        assert list(pytest_honors.item_constraints(item)) == [
+            SomeControls.spam,
+            OtherControls.favorite_color,
+        ]
+
+
+@pytest.mark.parametrize("line", ["tests/**", "re:tests/( = SomeControls.spam"])
+def test_configure_bad_patterns(line):
+    """Malformed honors_patterns lines are usage errors, not internal ones."""
+
+    config = mock.Mock()
+    config.getini.return_value = [line]
+
+    with mock.patch.object(pytest_honors, "_PATTERNS"):
+        with pytest.raises(pytest.UsageError, match="honors_patterns"):
+            pytest_honors.pytest_configure(config)
+
+
+def test_item_constraints_bad_reference():
+    """A pattern naming an unknown constraint is a usage error once a test matches it."""
+
+    item = mock.Mock(nodeid="tests/test_x.py::test_y", own_markers=[], fixturenames=[])
+    patterns = pytest_honors.PatternMatcher(["tests/** = Nope.spam"])
+
+    with pytest.raises(pytest.UsageError, match="tests/test_x.py::test_y.*'Nope'"):
+        list(pytest_honors.item_constraints(item, patterns))
+
+
+def test_merge_honorers_partial_run():
+    """Honorers outside the session are carried forward, and only visible ones are in scope."""
+
+    old_honorers = {
+        "SomeControls.spam": ["a.py::one", "b.py::two"],
+        "SomeControls.eggs": ["b.py::two"],
+        "OtherControls.favorite_color": ["a.py::gone"],
+    }
+    # Only a.py was collected, and a.py::three was deselected.
+    new_honorers = {"SomeControls.spam": ["a.py::one"], "SomeControls.eggs": ["a.py::three"]}
+
+    honorers, in_scope = pytest_honors.merge_honorers(
+        old_honorers, new_honorers, unseen={"b.py::two"}, selected={"a.py::one"}
+    )
+
+    assert honorers == {
+        "SomeControls.spam": ["a.py::one", "b.py::two"],
+        "SomeControls.eggs": ["a.py::three", "b.py::two"],
+    }
+    assert in_scope == {"SomeControls.spam", "OtherControls.favorite_color"}
+
+
+def scope_session(tmp_path, args):
+    """Return a stand-in session run from tmp_path with the given arguments."""
+
+    session = mock.Mock()
+    session.config.args = args
+    session.config.invocation_params.dir = tmp_path
+    session.config.rootpath = tmp_path
+    return session
+
+
+@pytest.mark.parametrize(
+    "args,collected,lastfailed,unseen",
+    [
+        # A file narrowed to one test only looks for that test.
+        (["a.py::one"], {"a.py"}, None, {"a.py::two[1]", "b.py::three"}),
+        # Parametrized tests are children of the function that was asked for.
+        (["a.py::two"], {"a.py"}, None, {"a.py::one", "b.py::three"}),
+        # Asking for the whole file, too, looks for everything in it.
+        (["a.py::one", "a.py"], {"a.py"}, None, {"b.py::three"}),
+        # A collected file that no tests came from was still looked at.
+        (["."], {"a.py", "b.py"}, None, set()),
+        # --lf skips files and tests that passed last time without saying so.
+        (["."], {"a.py", "b.py"}, {"a.py::one"}, {"a.py::two[1]", "b.py::three"}),
+    ],
+)
+def test_unseen_honorers(tmp_path, args, collected, lastfailed, unseen):
+    """Only honorers in files and nodes that the session asked for are looked for."""
+
+    for name in ("a.py", "b.py"):
+        (tmp_path / name).write_text("")
+    old_honorers = {
+        "SomeControls.spam": ["a.py::one", "a.py::two[1]", "b.py::three"],
+        "SomeControls.eggs": ["gone.py::four"],
+    }
+    session = scope_session(tmp_path, args)
+
+    with mock.patch.object(pytest_honors, "_COLLECTED_FILES", collected), mock.patch.object(
+        pytest_honors, "_LAST_FAILED", lastfailed
+    ):
+        assert pytest_honors.unseen_honorers(session, old_honorers) == unseen
+
+
+def test_last_failed_fixed_is_not_a_regression(pytester):
+    """Running --lf after fixing the only failing honorer doesn't lose its evidence."""
+
+    honoring = """
+        import pytest
+        from pytest_honors.constraints.iso27001 import ISO27001Controls
+
+        @pytest.mark.honors(ISO27001Controls.A_5_1)
+        def test_one():
+            assert {}
+
+        @pytest.mark.honors(ISO27001Controls.A_5_1)
+        def test_two():
+            pass
+    """
+    pytester.makepyfile(test_a=honoring.format(True))
+    pytester.runpytest_subprocess("--honors-store-counts").assert_outcomes(passed=2)
+    pytester.makepyfile(test_a=honoring.format(False))
+    pytester.runpytest_subprocess().assert_outcomes(passed=1, failed=1)
+    pytester.makepyfile(test_a=honoring.format(True))
+
+    result = pytester.runpytest_subprocess("--lf", "--honors-regression-fail")
+
+    result.assert_outcomes(passed=1)
+    assert result.ret == pytest.ExitCode.OK
+
+
+def test_make_honorers():
+    """make_honorers lists each constraint's honorers by nodeid."""
+
+    items = {SomeControls: {SomeControls.spam: [Func2, Func1]}}
+
+    assert pytest_honors.make_honorers(items) == {"SomeControls.spam": ["::func1", "::func2"]}
+
+
+def test_render_as_json():
+    """Known results yield the expected JSON report, with docstrings safely escaped."""
+
+    items = {
+        SomeControls: {SomeControls.spam: [Func1]},
+        OtherControls: {OtherControls.favorite_color: [Func2, Func1]},
+    }
+    results = {"::func1": "passed"}
+    cached = {"::func1": 0.0}
+
+    report = json.loads("".join(pytest_honors.render_as_json(items, results, cached)))
+
+    assert report["schema"] == "pytest-honors-report"
+    assert report["version"] == 1
+    assert [group["name"] for group in report["groups"]] == ["OtherControls", "SomeControls"]
+    assert report["groups"][0]["constraints"] == [
+        {
+            "key": "OtherControls.favorite_color",
+            "name": "favorite_color",
+            "value": "blue",
+            "tests": [
+                {
+                    "name": "Func dos",
+                    "nodeid": "::func2",
+                    "doc": "Func2's docs",
+                    "outcome": None,
+                    "cached_at": None,
+                },
+                {
+                    "name": "Func uno",
+                    "nodeid": "::func1",
+                    "doc": "Func1's docs",
+                    "outcome": "passed",
+                    "cached_at": "1970-01-01T00:00:00+00:00",
+                },
+            ],
+        }
+    ]
+    assert report["counts"] == {"OtherControls.favorite_color": 2, "SomeControls.spam": 1}
+
+
+def test_reports_start_after_last_honorer():
+    """Reports start as soon as the last pending honoring test tears down."""
+
+    emitter = mock.Mock()
+    with mock.patch.object(pytest_honors, "_EMITTER", emitter), mock.patch.object(
+        pytest_honors, "_PENDING", {"one", "two"}
+    ):
+        pytest_honors.pytest_runtest_logreport(MockReport("one", "call", "passed"))
+        pytest_honors.pytest_runtest_logreport(MockReport("one", "teardown", "passed"))
+        pytest_honors.pytest_runtest_logreport(MockReport("other", "teardown", "passed"))
+        emitter.start.assert_not_called()
+        pytest_honors.pytest_runtest_logreport(MockReport("two", "teardown", "passed"))
+        emitter.start.assert_called_once()
+
+
+def test_render_as_normalized_markdown():
+    """Known results yield the expected report, listing each test once and labeling cached ones."""
+
+    items = {
+        SomeControls: {SomeControls.spam: [Func1], SomeControls.eggs: [Func2]},
+        OtherControls: {OtherControls.favorite_color: [Func2, Func1]},
+    }
+
+    results = {"::func1": "passed", "::func2": "absconded"}
+
+    cached = {"::func1": 0.0}
+
+    report = list(pytest_honors.render_as_normalized_markdown(items, results, cached))
+
+    assert (
+        "\n".join(report)
+        == """
+# Tests
+
+- ID: <a id="t1"></a>T1
+  Name: Func dos
+  Explanation: "Func2's docs"
+  Path: ::func2
+  Result: **absconded**
+
+- ID: <a id="t2"></a>T2
+  Name: Func uno
+  Explanation: "Func1's docs"
+  Path: ::func1
+  Result: passed (cached from 1970-01-01 00:00 UTC)
+
+---
+
+# OtherControls - Other things are here.
+
+## favorite_color: blue
+
+Supporting evidence: [T1](#t1), [T2](#t2)
+
+---
+
+# SomeControls - Some things are here.
+
+## eggs: Eggs
+
+Supporting evidence: [T1](#t1)
+
+## spam: Spam
+
+Supporting evidence: [T2](#t2)"""
+    )
+
+
+def test_sessionstart_publishes_new_index():
+    """Each session gets its own index, so one that's already frozen is never emptied."""
+
+    session = mock.Mock()
+    session.config.stash = {}
+    with mock.patch.object(pytest_honors, "get_config_item", config_items()), mock.patch.object(
+        pytest_honors, "_ITEMS", HonorsIndex()
+    ):
+        pytest_honors.pytest_sessionstart(session)
+        first = session.config.stash[pytest_honors.HONORS_INDEX_KEY]
+        assert first is pytest_honors._ITEMS
+        first.add(Func1(), SomeControls.spam)
+        first.freeze()
+
+        pytest_honors.pytest_sessionstart(session)
+        second = session.config.stash[pytest_honors.HONORS_INDEX_KEY]
+        assert second is pytest_honors._ITEMS
+        assert second is not first
+        assert not second
+        assert first.constraints_for("::func1") == {SomeControls.spam}
+
+
+@pytest.mark.parametrize(
+    "result,cached_at,shown",
+    [
+        ("passed", None, "passed"),
+        ("passed", 0.0, "passed (cached from 1970-01-01 00:00 UTC)"),
+        ("failed", None, "**failed**"),
+    ],
+)
+def test_markdown_result(result, cached_at, shown):
+    """Only results that didn't pass are bolded, and cached passes are labeled, not bolded."""
+
+    assert pytest_honors.markdown_result(result, cached_at) == shown
+
+
+def test_missing_results_warn_once_on_main_thread():
+    """Renderers skip tests without results, and the plugin warns about each of them once."""
+
+    missing = mock.Mock(nodeid="::missing")
+    missing.name = "missing"
+    present = mock.Mock(nodeid="::present")
+    present.name = "present"
+    items = {SomeControls: {SomeControls.spam: [missing, present], SomeControls.eggs: [missing]}}
+    results = {"::present": "passed"}
+
+    report = "\n".join(pytest_honors.render_as_markdown(items, results))
+    report += "\n".join(pytest_honors.render_as_normalized_markdown(items, results))
+    assert "::missing" not in report
+    missing.warn.assert_not_called()
+
+    pytest_honors.warn_missing_results(items, results)
+    missing.warn.assert_called_once()
+    present.warn.assert_not_called()
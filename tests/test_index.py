@@ -0,0 +1,101 @@
+"""Test the pytest_honors.index module."""
+
+from typing import NamedTuple
+
+import pytest
+
+import pytest_honors
+from pytest_honors.constraints import ConstraintsGroup
+from pytest_honors.index import HonorsIndex
+
+
+class SomeControls(ConstraintsGroup):
+    """Some things are here."""
+
+    spam = "Spam"
+    eggs = "Eggs"
+
+
+class Item(NamedTuple):
+    nodeid: str
+
+
+ONE = Item("::one")
+TWO = Item("::two")
+
+
+@pytest.fixture
+def index():
+    """Return an index with a couple of honoring items."""
+
+    index = HonorsIndex()
+    index.add(ONE, SomeControls.spam)
+    index.add(ONE, SomeControls.eggs)
+    index.add(TWO, SomeControls.spam)
+    index.add(TWO, SomeControls.spam)
+    return index
+
+
+def test_lookups(index):
+    """Both lookup directions find the expected answers."""
+
+    assert index.constraints_for(ONE) == {SomeControls.spam, SomeControls.eggs}
+    assert index.constraints_for("::two") == {SomeControls.spam}
+    assert index.constraints_for("::three") == frozenset()
+    assert index.items_for(SomeControls.spam) == (ONE, TWO)
+    assert index.items_for(SomeControls.eggs) == (ONE,)
+    assert index.honors(TWO, SomeControls.spam)
+    assert not index.honors(TWO, SomeControls.eggs)
+    assert list(index.iter_group(SomeControls)) == [
+        (SomeControls.spam, (ONE, TWO)),
+        (SomeControls.eggs, (ONE,)),
+    ]
+    assert index.nodeids == {"::one", "::two"}
+
+
+def test_mapping_shape(index):
+    """An index can be used wherever the old nested dicts were."""
+
+    assert list(index) == [SomeControls]
+    assert pytest_honors.make_counts(index) == {"SomeControls.spam": 2, "SomeControls.eggs": 1}
+
+
+def test_freeze_and_snapshot(index):
+    """Frozen indexes and snapshots can't be changed, but the original can."""
+
+    snapshot = index.snapshot()
+    index.add(TWO, SomeControls.eggs)
+    assert snapshot.frozen
+    assert snapshot.items_for(SomeControls.eggs) == (ONE,)
+    with pytest.raises(RuntimeError):
+        snapshot.add(TWO, SomeControls.eggs)
+
+    index.freeze()
+    assert index.snapshot() is index
+    assert index.items_for(SomeControls.eggs) == (ONE, TWO)
+    with pytest.raises(RuntimeError):
+        index.add(ONE, SomeControls.eggs)
+
+    with pytest.raises(RuntimeError):
+        index.clear()
+    assert index.constraints_for(ONE) is index.constraints_for(ONE)
+
+
+def test_clear(index):
+    """An index that isn't frozen yet can be cleared and built again."""
+
+    index.clear()
+    assert not index
+    index.add(ONE, SomeControls.eggs)
+    assert index.constraints_for(ONE) == {SomeControls.eggs}
+
+
+def test_select(index):
+    """Items count as selected until a selection is recorded."""
+
+    assert index.selected == {"::one", "::two"}
+    index.select([TWO, Item("::unmarked")])
+    assert index.selected == {"::two"}
+    assert index.is_selected("::two")
+    assert not index.is_selected(ONE)
+    assert index.snapshot().selected == {"::two"}
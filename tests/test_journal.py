@@ -0,0 +1,142 @@
+"""Test the pytest_honors.journal module."""
+
+import time
+from unittest import mock
+
+import pytest_honors
+from pytest_honors.constraints import ConstraintsGroup
+from pytest_honors.index import HonorsIndex
+from pytest_honors.journal import NOT_RUN, SETUP_ERROR, EvidenceJournal, recover
+
+
+class SomeControls(ConstraintsGroup):
+    """Some things are here."""
+
+    spam = "Spam"
+    eggs = "Eggs"
+
+
+class Func1:
+    nodeid = "::func1"
+    name = "Func uno"
+
+    def obj(self):
+        """Func1's "quoted" docs"""
+
+
+class Func2:
+    nodeid = "::func2"
+    name = "Func dos"
+
+    def obj(self):
+        """Func2's docs"""
+
+
+def make_journal(path):
+    """Write a journal for a session that never finished."""
+
+    index = HonorsIndex()
+    index.add(Func1, SomeControls.spam)
+    index.add(Func1, SomeControls.eggs)
+    index.add(Func2, SomeControls.eggs)
+
+    journal = EvidenceJournal(str(path))
+    journal.start()
+    journal.index(index)
+    journal.result("::func1", "passed")
+    journal.flush()
+    return journal
+
+
+def test_recover_unfinished(tmp_path):
+    """A journal from an unfinished session rebuilds the counts and the report."""
+
+    path = tmp_path / "journal.jsonl"
+    make_journal(path)
+    # Simulate the process dying halfway through writing a line.
+    with open(path, "a") as outfile:
+        outfile.write('{"type": "result", "nodeid": "::fu')
+
+    recovered = recover(str(path))
+
+    assert recovered.exitstatus is None
+    assert recovered.results == {"::func1": "passed", "::func2": NOT_RUN}
+    assert pytest_honors.make_counts(recovered.items) == {
+        "SomeControls.spam": 1,
+        "SomeControls.eggs": 2,
+    }
+    report = "\n".join(pytest_honors.render_as_markdown(recovered.items, recovered.results))
+    assert "# SomeControls - Some things are here." in report
+    assert '  Explanation: "Func1\'s "quoted" docs"' in report
+    assert "  Result: **not run**" in report
+
+
+def test_recover_finished(tmp_path):
+    """A finished session's exit status is recovered."""
+
+    path = tmp_path / "journal.jsonl"
+    journal = make_journal(path)
+    journal.result("::func2", "failed")
+    journal.finish(1)
+    journal.close()
+
+    recovered = recover(str(path))
+
+    assert recovered.exitstatus == 1
+    assert recovered.results == {"::func1": "passed", "::func2": "failed"}
+
+
+def test_journal_batches(tmp_path, monkeypatch):
+    """Records are held in memory until a batch fills up."""
+
+    monkeypatch.setattr("pytest_honors.journal.BATCH_SIZE", 3)
+    monkeypatch.setattr("pytest_honors.journal.FLUSH_SECONDS", 3600)
+    path = tmp_path / "journal.jsonl"
+    journal = EvidenceJournal(str(path))
+
+    journal.result("::one", "passed")
+    journal.result("::two", "passed")
+    assert path.read_text() == ""
+    journal.result("::three", "passed")
+    assert len(path.read_text().splitlines()) == 3
+    journal.close()
+
+
+def test_journal_flushes_on_timer(tmp_path, monkeypatch):
+    """A partial batch is written after FLUSH_SECONDS, even if nothing else is queued."""
+
+    monkeypatch.setattr("pytest_honors.journal.FLUSH_SECONDS", 0.05)
+    path = tmp_path / "journal.jsonl"
+    journal = EvidenceJournal(str(path))
+
+    journal.result("::one", "passed")
+    deadline = time.monotonic() + 5
+    while not path.read_text() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert path.read_text().count("::one") == 1
+    journal.close()
+
+
+def test_journal_setup_errors(tmp_path):
+    """Honorers whose setup failed are journaled as errors, not left as "not run"."""
+
+    path = tmp_path / "journal.jsonl"
+    index = HonorsIndex()
+    index.add(Func1, SomeControls.spam)
+    index.add(Func2, SomeControls.eggs)
+    journal = EvidenceJournal(str(path))
+    journal.index(index)
+
+    reports = [
+        mock.Mock(nodeid="::func1", when="setup", failed=True),
+        mock.Mock(nodeid="::func2", when="setup", failed=False),
+        mock.Mock(nodeid="::func2", when="call", outcome="passed"),
+    ]
+    with mock.patch.object(pytest_honors, "_JOURNAL", journal), mock.patch.object(
+        pytest_honors, "_ITEMS", index
+    ):
+        for report in reports:
+            pytest_honors.pytest_runtest_logreport(report)
+    journal.close()
+
+    assert recover(str(path)).results == {"::func1": SETUP_ERROR, "::func2": "passed"}
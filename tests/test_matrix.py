@@ -0,0 +1,164 @@
+"""Test the pytest_honors.matrix module."""
+
+import gzip
+import json
+from typing import NamedTuple
+
+import pytest
+
+from pytest_honors import __main__, matrix
+from pytest_honors.constraints import ConstraintsGroup
+from pytest_honors.index import HonorsIndex
+from pytest_honors.matrix import CoverageMatrix, Overlap, Subsumed
+
+
+class SomeControls(ConstraintsGroup):
+    """Some things are here."""
+
+    spam = "Spam"
+    eggs = "Eggs"
+    ham = "Ham"
+
+
+class Item(NamedTuple):
+    nodeid: str
+
+
+ROWS = {
+    "::broad": {"SomeControls.spam", "SomeControls.eggs", "SomeControls.ham"},
+    "::narrow": {"SomeControls.spam", "SomeControls.eggs"},
+    "::copy": {"SomeControls.spam", "SomeControls.eggs"},
+    "::lonely": {"SomeControls.ham"},
+}
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    """Run the test with and without NumPy."""
+
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(matrix, "numpy", None)
+    return request.param
+
+
+def test_from_rows():
+    """Rows and columns are sorted, and each row's columns are in ascending order."""
+
+    coverage = CoverageMatrix.from_rows(ROWS)
+    assert coverage.tests == ["::broad", "::copy", "::lonely", "::narrow"]
+    assert coverage.constraints == ["SomeControls.eggs", "SomeControls.ham", "SomeControls.spam"]
+    assert coverage.shape == (4, 3)
+    assert coverage.nnz == 8
+    assert list(coverage.indptr) == [0, 3, 5, 6, 8]
+    assert list(coverage.row(0)) == [0, 1, 2]
+    assert list(coverage.row(2)) == [1]
+
+
+def test_from_items():
+    """An HonorsIndex converts to the same matrix as its rows."""
+
+    index = HonorsIndex()
+    for nodeid, keys in ROWS.items():
+        for key in keys:
+            index.add(Item(nodeid), SomeControls[key.partition(".")[2]])
+
+    for coverage in (index.to_matrix(), CoverageMatrix.from_items(index)):
+        assert coverage.tests == CoverageMatrix.from_rows(ROWS).tests
+        assert list(coverage.indices) == list(CoverageMatrix.from_rows(ROWS).indices)
+
+
+def test_from_json_report(tmp_path):
+    """The JSON report, compressed or not, converts to the same matrix as its rows."""
+
+    report = {
+        "groups": [
+            {
+                "name": "SomeControls",
+                "constraints": [
+                    {"key": "SomeControls.ham", "tests": [{"nodeid": "::one"}]},
+                    {
+                        "key": "SomeControls.spam",
+                        "tests": [{"nodeid": "::one"}, {"nodeid": "::two"}],
+                    },
+                ],
+            }
+        ]
+    }
+    plain = tmp_path / "report.json"
+    plain.write_text(json.dumps(report))
+    compressed = tmp_path / "report.json.gz"
+    with gzip.open(compressed, "wt") as outfile:
+        json.dump(report, outfile)
+
+    for path in (plain, compressed):
+        coverage = CoverageMatrix.from_json_report(str(path))
+        assert coverage.tests == ["::one", "::two"]
+        assert coverage.constraints == ["SomeControls.ham", "SomeControls.spam"]
+        assert list(coverage.indices) == [0, 1, 1]
+
+
+def test_counts(backend):
+    """Column counts and co-coverage count the tests honoring each constraint and pair."""
+
+    coverage = CoverageMatrix.from_rows(ROWS)
+    assert coverage.column_counts() == [3, 2, 3]
+    assert coverage.co_coverage() == {
+        (0, 0): 3,
+        (1, 1): 2,
+        (2, 2): 3,
+        (0, 1): 1,
+        (0, 2): 3,
+        (1, 2): 1,
+    }
+
+
+def test_overlaps(backend):
+    """Overlapping pairs are sorted by Jaccard index and filtered by the minimum."""
+
+    coverage = CoverageMatrix.from_rows(ROWS)
+    assert coverage.overlaps() == [
+        Overlap("SomeControls.eggs", "SomeControls.spam", 3, 1.0),
+        Overlap("SomeControls.eggs", "SomeControls.ham", 1, 0.25),
+        Overlap("SomeControls.ham", "SomeControls.spam", 1, 0.25),
+    ]
+    assert coverage.overlaps(min_jaccard=0.5) == coverage.overlaps(top=1)
+    assert len(coverage.overlaps(min_jaccard=0.5)) == 1
+
+
+def test_subsumed():
+    """Duplicate tests and tests covered by a broader one are both found."""
+
+    coverage = CoverageMatrix.from_rows({**ROWS, "::nothing": set()})
+    assert coverage.subsumed() == [
+        Subsumed("::copy", "::broad", False),
+        Subsumed("::lonely", "::broad", False),
+        Subsumed("::narrow", "::copy", True),
+    ]
+
+
+def test_analyze(tmp_path, capsys):
+    """The analyze command summarizes a report."""
+
+    report = tmp_path / "report.json"
+    report.write_text(
+        json.dumps(
+            {
+                "groups": [
+                    {
+                        "name": "SomeControls",
+                        "constraints": [
+                            {"key": "SomeControls.spam", "tests": [{"nodeid": "::one"}]},
+                            {"key": "SomeControls.eggs", "tests": [{"nodeid": "::one"}]},
+                        ],
+                    }
+                ]
+            }
+        )
+    )
+
+    assert __main__.main(["analyze", str(report)]) == 0
+    output = capsys.readouterr().out
+    assert "1 tests honor 2 constraints in 2 pairs" in output
+    assert "1.00  SomeControls.eggs & SomeControls.spam (1 shared)" in output
@@ -0,0 +1,117 @@
+"""Test the pytest_honors.patterns module."""
+
+import pytest
+
+from pytest_honors.constraints.iso27001 import ISO27001Controls
+from pytest_honors.patterns import PatternMatcher, glob_to_regex, regex_prefix, scope_flags
+
+MATCHER = PatternMatcher(
+    [
+        "tests/auth/** = ISO27001Controls.A_11_5_2",
+        "tests/auth/test_login.py::* = "
+        "pytest_honors.constraints.iso27001:ISO27001Controls.A_11_5_3",
+        "tests/*/test_audit*.py::* = ISO27001Controls.A_10_10_1, ISO27001Controls.A_10_10_2",
+        r"re:.*::test_\w*password = ISO27001Controls.A_11_3_1",
+    ]
+)
+
+
+@pytest.mark.parametrize(
+    "nodeid,expected",
+    [
+        ("tests/auth/test_login.py::test_ok", ["A_11_5_2", "A_11_5_3"]),
+        ("tests/auth/sub/test_x.py::TestX::test_y", ["A_11_5_2"]),
+        ("tests/db/test_audit_log.py::test_writes", ["A_10_10_1", "A_10_10_2"]),
+        ("tests/db/sub/test_audit_log.py::test_writes", []),
+        ("tests/db/test_user.py::test_weak_password", ["A_11_3_1"]),
+        ("tests/db/test_user.py::test_email", []),
+    ],
+)
+def test_match(nodeid, expected):
+    """Nodeids get the constraints of every rule they match, in rule order."""
+
+    assert [constraint.name for constraint in MATCHER.match(nodeid)] == expected
+
+
+def test_candidates_use_prefixes():
+    """Rules are only tried when the nodeid starts with their literal prefix."""
+
+    assert MATCHER.candidates("other/test_x.py::test_y") == []
+    assert sorted(MATCHER.candidates("tests/auth/test_login.py::test_ok")) == [0, 1, 2]
+    assert MATCHER.candidates("tests/db/test_user.py::test_email") == [2]
+
+
+def test_glob_to_regex():
+    """Single stars stop at slashes, but double stars don't."""
+
+    assert glob_to_regex("a/*.py") == r"a/[^/]*\.py\Z"
+    assert glob_to_regex("a/**") == r"a/.*\Z"
+
+
+@pytest.mark.parametrize(
+    "regex,prefix",
+    [("tests/auth", "tests/auth"), ("tests/a?uth", "tests/"), (".*::test", ""), ("a|b", "")],
+)
+def test_regex_prefix(regex, prefix):
+    """Only text that every match must start with is used as a prefix."""
+
+    assert regex_prefix(regex) == prefix
+
+
+@pytest.mark.parametrize(
+    "regex,scoped",
+    [
+        ("(?i).*auth", "(?i:.*auth)"),
+        ("(?i)(?s)a", "(?is:a)"),
+        ("(?x) a  # comment", "(?x: a  # comment\n)"),
+        ("a(?i)b", "a(?i)b"),
+    ],
+)
+def test_scope_flags(regex, scoped):
+    """Leading inline flags are scoped to their own regex, so it can be joined with others."""
+
+    assert scope_flags(regex) == scoped
+
+
+def test_combined_regexes():
+    """Regexes with inline flags or the same group names still work together."""
+
+    matcher = PatternMatcher(
+        [
+            "re:(?i).*auth = ISO27001Controls.A_5",
+            "re:(?P<kind>unit|func)/ = ISO27001Controls.A_6",
+            "re:.*/(?P<kind>db)/ = ISO27001Controls.A_7",
+        ]
+    )
+
+    assert matcher.match("tests/AUTH/test_x.py") == [ISO27001Controls.A_5]
+    assert matcher.match("unit/db/test_x.py") == [ISO27001Controls.A_6, ISO27001Controls.A_7]
+    assert matcher.match("tests/test_x.py") == []
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "tests/**",
+        "tests/** = ",
+        "= ISO27001Controls.A_5",
+        "tests/** = A_5",
+        "tests/** = Nope.A_5",
+        "tests/** = nope.nope:Nope.A_5",
+        "re:tests/( = ISO27001Controls.A_5",
+        "re:a(?i)b = ISO27001Controls.A_5",
+    ],
+)
+def test_bad_lines(line):
+    """Malformed lines and unknown constraints are errors."""
+
+    with pytest.raises(ValueError):
+        PatternMatcher([line]).match("tests/test_x.py::test_y")
+
+
+def test_resolves_once():
+    """References are looked up once and then remembered."""
+
+    matcher = PatternMatcher(["** = ISO27001Controls.A_5"])
+    assert matcher.match("x") == [ISO27001Controls.A_5]
+    assert matcher._resolved == {"ISO27001Controls.A_5": ISO27001Controls.A_5}
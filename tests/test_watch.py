@@ -0,0 +1,114 @@
+"""Test the pytest_honors.watch module."""
+
+import io
+import os
+
+from pytest_honors import make_counts
+from pytest_honors.watch import Watcher, is_test_file
+
+WATCHED = '''
+from pytest import mark
+from pytest_honors.constraints.iso27001 import ISO27001Controls
+
+@mark.honors(ISO27001Controls.A_12_5_3)
+def test_one():
+    """Honors one control."""
+'''
+
+
+def test_is_test_file():
+    """Only files matching pytest's default patterns are treated as test modules."""
+
+    assert is_test_file("tests/test_spam.py")
+    assert is_test_file("tests/spam_test.py")
+    assert not is_test_file("tests/conftest.py")
+    assert not is_test_file("tests/helpers.py")
+
+
+def test_watcher_recollects_changed_files(tmp_path):
+    """Editing a watched test file updates the index, counts, and report."""
+
+    testfile = tmp_path / "test_watched.py"
+    testfile.write_text(WATCHED)
+    report = tmp_path / "report.md"
+    out = io.StringIO()
+    watcher = Watcher([str(tmp_path)], report=str(report), out=out)
+
+    watcher.mtimes = watcher.scan()
+    watcher.refresh(watcher.args)
+    watcher.emit()
+    assert "1 constraints honored by 1 tests" in out.getvalue()
+    assert "Result: **not run**" in report.read_text()
+
+    assert not watcher.poll()
+
+    testfile.write_text(
+        WATCHED
+        + '''
+@mark.honors(ISO27001Controls.A_12_5_3, ISO27001Controls.A_5_1_1)
+def test_two():
+    """Honors two controls."""
+'''
+    )
+    stat = os.stat(testfile)
+    os.utime(testfile, (stat.st_atime, stat.st_mtime + 10))
+    assert watcher.poll()
+    watcher.emit()
+    assert "2 constraints honored by 2 tests" in out.getvalue()
+    assert "test_watched.py::test_two" in report.read_text()
+
+    testfile.unlink()
+    assert watcher.poll()
+    assert not watcher.items()
+
+
+def test_watcher_keeps_index_when_conftest_breaks(tmp_path):
+    """A conftest that fails to import leaves the last good index in place."""
+
+    (tmp_path / "test_guarded.py").write_text(WATCHED)
+    conftest = tmp_path / "conftest.py"
+    conftest.write_text("")
+    out = io.StringIO()
+    watcher = Watcher([str(tmp_path)], out=out)
+    watcher.mtimes = watcher.scan()
+    watcher.refresh(watcher.args)
+
+    conftest.write_text("import no_such_module_anywhere\n")
+    stat = os.stat(conftest)
+    os.utime(conftest, (stat.st_atime, stat.st_mtime + 10))
+    assert watcher.poll()
+    assert "keeping last index" in out.getvalue()
+    watcher.emit()
+    assert "1 constraints honored by 1 tests" in out.getvalue()
+
+
+def test_watcher_keeps_conftest_groups_together(tmp_path):
+    """Groups defined in conftest.py stay one group after only some files are collected again."""
+
+    (tmp_path / "conftest.py").write_text(
+        "from pytest_honors.constraints import ConstraintsGroup\n\n"
+        "class LocalControls(ConstraintsGroup):\n"
+        '    """Local things."""\n\n'
+        '    first = "First"\n'
+        '    second = "Second"\n'
+    )
+    for name in ("test_local_one.py", "test_local_two.py"):
+        (tmp_path / name).write_text(
+            "from pytest import mark\n"
+            "from conftest import LocalControls\n\n"
+            "@mark.honors(LocalControls.first)\n"
+            f"def test_{name[11:-3]}():\n"
+            "    pass\n"
+        )
+    out = io.StringIO()
+    watcher = Watcher([str(tmp_path)], out=out)
+    watcher.mtimes = watcher.scan()
+    watcher.refresh(watcher.args)
+
+    touched = tmp_path / "test_local_one.py"
+    stat = os.stat(touched)
+    os.utime(touched, (stat.st_atime, stat.st_mtime + 10))
+    assert watcher.poll()
+    items = watcher.items()
+    assert len(items) == 1
+    assert make_counts(items) == {"LocalControls.first": 2}